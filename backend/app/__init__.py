@@ -1,12 +1,16 @@
 import os
 
-from flask import Flask
+from flask import Flask, g
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 
+from app.cli import init_cli
 from app.config import config
 from app.models import db
-from app.redis_client import init_redis, is_token_blacklisted
+from app.passwords import init_passwords
+from app.rabbitmq import init_rabbitmq
+from app.redis_client import init_redis, is_token_revoked, prefetch_cache
+from app.user_cache import init_user_cache
 
 
 def create_app(config_name: str = None):
@@ -29,22 +33,33 @@ def create_app(config_name: str = None):
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     db.init_app(app)
     jwt = JWTManager(app)
+    init_passwords(app)
     init_redis(app)
+    init_rabbitmq(app)
+    init_user_cache(app)
+    init_cli(app)
 
     # JWT token blacklist check
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
-        jti = jwt_payload["jti"]
-        return is_token_blacklisted(jti)
+        # Queue the handler's cache reads so they share the blocklist lookup's
+        # round trip
+        key_fns = g.pop("redis_prefetch", ())
+        if key_fns:
+            user_id = int(jwt_payload["sub"])
+            prefetch_cache(*(key_fn(user_id) for key_fn in key_fns))
+        return is_token_revoked(jwt_payload)
 
     # Register blueprints
     from app.routes import bp
+    from app.routes_admin import admin_bp
     from app.routes_auth import auth_bp
     from app.routes_users import users_bp
 
     app.register_blueprint(bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(users_bp)
+    app.register_blueprint(admin_bp)
 
     # Create database tables
     with app.app_context():
@@ -1,18 +1,80 @@
 """Authentication utilities and decorators."""
 
+import hmac
 from functools import wraps
+from typing import Any, Callable, Iterable, Optional
 
-from flask import jsonify
+from flask import current_app, g, jsonify, request
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
+from app.models import User
 from app.services import UserService
 
 
-def jwt_required_custom():
+class UserNotFoundError(Exception):
+    """Raised when the user referenced by a valid token no longer exists."""
+
+
+class LazyUser:
+    """Proxy for the authenticated user that defers the database lookup.
+
+    The user ID comes straight from the verified JWT identity, so handlers
+    can build cache keys from ``current_user.id`` without touching the
+    database. Any other attribute access loads the ``User`` row once and
+    delegates to it.
+
+    Attributes:
+        id: Authenticated user's ID (from the JWT identity)
+    """
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self._user: Optional[User] = None
+
+    def get(self) -> User:
+        """Load (once) and return the underlying User object.
+
+        Returns:
+            User object
+
+        Raises:
+            UserNotFoundError: If the user doesn't exist
+        """
+        if self._user is None:
+            self._user = UserService.get_by_id(self.id)
+            if self._user is None:
+                raise UserNotFoundError(self.id)
+        return self._user
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the User row has been loaded from the database."""
+        return self._user is not None
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate attribute access to the loaded User object."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        """String representation of LazyUser."""
+        return f"<LazyUser {self.id}>"
+
+
+def jwt_required_custom(prefetch: Optional[Iterable[Callable[[int], str]]] = None):
     """Decorator to protect routes with JWT authentication.
 
-    This decorator verifies the JWT token and loads the current user.
-    It returns a 401 error if the token is invalid or the user doesn't exist.
+    This decorator verifies the JWT token and passes a lazy proxy of the
+    current user. The user is only loaded from the database when the
+    handler accesses anything other than its ``id``, so responses served
+    from cache cost no SQL. It returns a 401 error if the token is invalid
+    or the user doesn't exist.
+
+    Args:
+        prefetch: Functions mapping the user ID to cache keys the handler
+            will read; they are fetched together with the token blocklist
+            check in a single Redis round trip
 
     Returns:
         Decorated function that includes current_user in kwargs
@@ -21,20 +83,45 @@ def jwt_required_custom():
         @wraps(fn)
         def wrapper(*args, **kwargs):
             try:
+                # Read by the blocklist loader once the identity is known
+                g.redis_prefetch = tuple(prefetch or ())
                 verify_jwt_in_request()
                 user_id = get_jwt_identity()
 
-                # Load user from database (identity is stored as string)
-                current_user = UserService.get_by_id(int(user_id))
-                if not current_user:
-                    return jsonify({"error": "User not found"}), 401
+                # Identity is stored as string; the user is loaded lazily
+                current_user = LazyUser(int(user_id))
 
                 # Pass current_user to the route handler
                 return fn(*args, current_user=current_user, **kwargs)
 
+            except UserNotFoundError:
+                return jsonify({"error": "User not found"}), 401
             except Exception as e:
                 return jsonify({"error": "Invalid or expired token"}), 401
 
         return wrapper
 
     return decorator
+
+
+def admin_token_required(fn):
+    """Decorator to protect admin routes with the shared ADMIN_API_TOKEN.
+
+    The token is sent in the ``X-Admin-Token`` header. Admin routes are
+    disabled (403) while ADMIN_API_TOKEN is not configured.
+
+    Returns:
+        Decorated function
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get("ADMIN_API_TOKEN")
+        if not expected:
+            return jsonify({"error": "Admin API is disabled"}), 403
+
+        token = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(token.encode(), expected.encode()):
+            return jsonify({"error": "Invalid admin token"}), 401
+        return fn(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,139 @@
+"""Pluggable serializers for values stored in the Redis cache.
+
+Encoded values start with a one-byte header naming the codec (and whether
+the body is zlib-compressed). Plain JSON is written without a header, so
+entries from older workers and new JSON entries stay mutually readable
+during a rollout; any value whose first byte is not a known header is
+decoded as JSON.
+"""
+
+import json
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+import msgpack
+
+# Header flag marking a zlib-compressed body
+COMPRESSED = 0x10
+
+
+class CacheCodec(ABC):
+    """Base class for cache serializers.
+
+    Attributes:
+        name: Name used in CACHE_CODEC
+        header: Header byte (< 0x10, so it can never start a JSON document)
+    """
+
+    name: str = ""
+    header: int = 0
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """Serialize a value."""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Deserialize a value."""
+
+
+class JsonCodec(CacheCodec):
+    """Compact UTF-8 JSON (the legacy format)."""
+
+    name = "json"
+    header = 0x01
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackCodec(CacheCodec):
+    """MessagePack binary encoding."""
+
+    name = "msgpack"
+    header = 0x02
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+_codecs_by_name: dict[str, CacheCodec] = {}
+_codecs_by_header: dict[int, CacheCodec] = {}
+
+
+def register_codec(codec: CacheCodec) -> None:
+    """Make a codec available for encoding (by name) and decoding (by header).
+
+    Args:
+        codec: Codec instance with a unique name and header byte
+    """
+    _codecs_by_name[codec.name] = codec
+    _codecs_by_header[codec.header] = codec
+
+
+register_codec(JsonCodec())
+register_codec(MsgpackCodec())
+
+
+def get_codec(name: str) -> Optional[CacheCodec]:
+    """Return a registered codec by name, or None if unknown."""
+    return _codecs_by_name.get(name)
+
+
+def encode(value: Any, codec: CacheCodec, compress_threshold: int = 0) -> bytes:
+    """Serialize a value for the cache.
+
+    Args:
+        value: Value to serialize
+        codec: Codec to use
+        compress_threshold: Compress bodies at least this large (0 disables)
+
+    Returns:
+        Encoded bytes (plain JSON when the JSON codec needs no compression)
+    """
+    body = codec.dumps(value)
+    header = codec.header
+
+    if compress_threshold and len(body) >= compress_threshold:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            body = compressed
+            header |= COMPRESSED
+
+    if header == JsonCodec.header:
+        return body
+    return bytes((header,)) + body
+
+
+def decode(data: bytes) -> Any:
+    """Deserialize a cached value written by encode() or a legacy JSON writer.
+
+    Args:
+        data: Raw bytes from Redis
+
+    Returns:
+        Deserialized value
+
+    Raises:
+        ValueError: If the header names a codec that is not registered
+    """
+    header = data[0]
+    if header >= 0x20 or header in b"\t\n\r":
+        # No header: legacy/plain JSON text
+        return json.loads(data)
+
+    codec = _codecs_by_header.get(header & ~COMPRESSED)
+    if codec is None:
+        raise ValueError(f"Unknown cache codec header: {header:#x}")
+
+    body = data[1:]
+    if header & COMPRESSED:
+        body = zlib.decompress(body)
+    return codec.loads(body)
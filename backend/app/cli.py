@@ -0,0 +1,108 @@
+"""Admin commands for the ``flask`` CLI."""
+
+import io
+import json
+import sys
+
+import click
+import pika
+from flask import Flask, current_app
+from flask.cli import AppGroup
+
+from app.rabbitmq import (
+    EMAIL_DEAD_LETTER_QUEUE,
+    EMAIL_QUEUE,
+    connection_parameters,
+    declare_email_queues,
+    replay_dead_letters,
+)
+from app.redis_client import reindex_blocklist
+from app.user_import import FORMATS, UserImporter, detect_format
+
+email_cli = AppGroup("email", help="Email queue administration.")
+users_cli = AppGroup("users", help="User administration.")
+tokens_cli = AppGroup("tokens", help="JWT blocklist administration.")
+
+
+@email_cli.command("replay-dlq")
+@click.option("--limit", type=int, default=None, help="Replay at most this many.")
+@click.option("--batch-size", type=int, default=100, show_default=True)
+def replay_dlq(limit, batch_size):
+    """Move dead-lettered emails back to the email queue."""
+    connection = pika.BlockingConnection(connection_parameters(current_app))
+    try:
+        channel = connection.channel()
+        declare_email_queues(channel, current_app.config["EMAIL_RETRY_DELAYS"])
+        waiting = channel.queue_declare(
+            queue=EMAIL_DEAD_LETTER_QUEUE, durable=True, passive=True
+        ).method.message_count
+        click.echo(f"{waiting} message(s) in {EMAIL_DEAD_LETTER_QUEUE}")
+
+        replayed = replay_dead_letters(channel, limit=limit, batch_size=batch_size)
+        click.echo(f"Replayed {replayed} message(s) to {EMAIL_QUEUE}")
+    finally:
+        connection.close()
+
+
+@users_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option(
+    "--format", "fmt", type=click.Choice(FORMATS), default=None,
+    help="Input format (default: from the file extension).",
+)
+@click.option("--batch-size", type=int, default=None, help="Rows per transaction.")
+@click.option("--no-email", is_flag=True, help="Do not send registration emails.")
+@click.option(
+    "--report", type=click.File("w"), default="-", show_default=True,
+    help="Where to write the per-row results (NDJSON).",
+)
+def import_users(path, fmt, batch_size, no_email, report):
+    """Bulk-create users from a CSV or NDJSON file (- for stdin)."""
+    fmt = fmt or detect_format(filename=path)
+    if fmt is None:
+        raise click.UsageError("Cannot tell the format from the file name; pass --format.")
+
+    importer = UserImporter(
+        batch_size=batch_size or current_app.config["USER_IMPORT_BATCH_SIZE"],
+        send_emails=not no_email,
+    )
+
+    def write_result(result: dict):
+        report.write(json.dumps(result) + "\n")
+
+    if path == "-":
+        stream = io.TextIOWrapper(
+            sys.stdin.buffer, encoding="utf-8-sig", errors="replace", newline=""
+        )
+    else:
+        stream = open(path, encoding="utf-8-sig", errors="replace", newline="")
+    with stream:
+        summary = importer.run(stream, fmt, on_result=write_result)
+
+    click.echo(
+        f"{summary['total']} row(s) in {summary['seconds']}s: "
+        f"{summary['created']} created, {summary['duplicate']} duplicate, "
+        f"{summary['invalid']} invalid, {summary['error']} error",
+        err=True,
+    )
+
+
+@tokens_cli.command("reindex-blocklist")
+def reindex_blocklist_command():
+    """Index revocations made before the blocklist index existed."""
+    indexed = reindex_blocklist()
+    if indexed is None:
+        click.echo("Redis unavailable", err=True)
+        sys.exit(1)
+    click.echo(f"Indexed {indexed} revoked token(s)")
+
+
+def init_cli(app: Flask) -> None:
+    """Register admin command groups.
+
+    Args:
+        app: Flask application instance
+    """
+    app.cli.add_command(email_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(tokens_cli)
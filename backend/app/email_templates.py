@@ -0,0 +1,207 @@
+"""Email templates for the email consumer, compiled once at startup.
+
+Templates are keyed by the message's ``event`` and a locale, each with a
+subject, a plain-text body and an HTML body. Lookup falls back to the
+default locale and then to the ``default`` event. Messages are rendered
+straight to a multipart/alternative string: the headers that never
+change are prebuilt, so only recipient, subject, date and bodies are
+filled in per message (``email.mime`` objects are much slower to build
+and serialize). Header values come from user data, so line breaks are
+removed from the subject and rejected in the recipient and message ID.
+"""
+
+import base64
+import re
+from email.header import Header
+from email.utils import formatdate
+from typing import Any, Optional
+
+from jinja2 import Environment, StrictUndefined, Template
+
+# (event, locale) -> subject / text / html sources
+TEMPLATES: dict[tuple[str, str], dict[str, str]] = {
+    ("default", "en"): {
+        "subject": "CDV Webapp - {{ event }}",
+        "text": (
+            "Hello {{ first_name }} {{ last_name }},\n\n"
+            "Event: {{ event }}\n\n"
+            "Best regards,\nCDV Webapp Team\n"
+        ),
+        "html": (
+            "<p>Hello {{ first_name }} {{ last_name }},</p>"
+            "<p>Event: {{ event }}</p>"
+            "<p>Best regards,<br>CDV Webapp Team</p>"
+        ),
+    },
+    ("default", "pl"): {
+        "subject": "CDV Webapp - {{ event }}",
+        "text": (
+            "Witaj {{ first_name }} {{ last_name }},\n\n"
+            "Zdarzenie: {{ event }}\n\n"
+            "Pozdrawiamy,\nZespół CDV Webapp\n"
+        ),
+        "html": (
+            "<p>Witaj {{ first_name }} {{ last_name }},</p>"
+            "<p>Zdarzenie: {{ event }}</p>"
+            "<p>Pozdrawiamy,<br>Zespół CDV Webapp</p>"
+        ),
+    },
+    ("user_registered", "en"): {
+        "subject": "Welcome to CDV Webapp, {{ first_name }}!",
+        "text": (
+            "Hello {{ first_name }} {{ last_name }},\n\n"
+            "Your account was created on {{ registered_at }}.\n\n"
+            "Best regards,\nCDV Webapp Team\n"
+        ),
+        "html": (
+            "<p>Hello {{ first_name }} {{ last_name }},</p>"
+            "<p>Your account was created on {{ registered_at }}.</p>"
+            "<p>Best regards,<br>CDV Webapp Team</p>"
+        ),
+    },
+    ("user_registered", "pl"): {
+        "subject": "Witamy w CDV Webapp, {{ first_name }}!",
+        "text": (
+            "Witaj {{ first_name }} {{ last_name }},\n\n"
+            "Twoje konto zostało utworzone {{ registered_at }}.\n\n"
+            "Pozdrawiamy,\nZespół CDV Webapp\n"
+        ),
+        "html": (
+            "<p>Witaj {{ first_name }} {{ last_name }},</p>"
+            "<p>Twoje konto zostało utworzone {{ registered_at }}.</p>"
+            "<p>Pozdrawiamy,<br>Zespół CDV Webapp</p>"
+        ),
+    },
+}
+
+BOUNDARY = "==cdv-webapp-alternative=="
+
+_LINE_BREAKS = re.compile(r"[\r\n]+")
+
+
+class InvalidMessageError(ValueError):
+    """Raised when a message cannot be turned into a safe email."""
+
+
+class CompiledTemplate:
+    """Subject, text and HTML templates for one event and locale."""
+
+    def __init__(self, subject: Template, text: Template, html: Template):
+        self.subject = subject
+        self.text = text
+        self.html = html
+
+
+def _encode_body(body: str) -> str:
+    """Base64-encode a UTF-8 body in 76-character CRLF-terminated lines."""
+    return base64.encodebytes(body.encode()).decode("ascii").replace("\n", "\r\n")
+
+
+def _encode_header(value: str) -> str:
+    """Encode free text for a header, joining its lines so none can be injected."""
+    value = _LINE_BREAKS.sub(" ", value)
+    if value.isascii():
+        return value
+    return Header(value, "utf-8").encode(linesep="\r\n")
+
+
+def _single_line(name: str, value: Any) -> str:
+    """Return a header value that must not contain line breaks."""
+    value = str(value)
+    if _LINE_BREAKS.search(value):
+        raise InvalidMessageError(f"Line break in {name}")
+    return value
+
+
+class TemplateRegistry:
+    """Compiled email templates and the prebuilt MIME layout.
+
+    Attributes:
+        sender: From address
+        default_locale: Locale used when the message has none (or an unknown one)
+    """
+
+    def __init__(
+        self,
+        templates: Optional[dict[tuple[str, str], dict[str, str]]] = None,
+        sender: str = "noreply@cdv-webapp.local",
+        default_locale: str = "en",
+    ):
+        self.sender = sender
+        self.default_locale = default_locale
+
+        text_env = Environment(autoescape=False, undefined=StrictUndefined)
+        html_env = Environment(autoescape=True, undefined=StrictUndefined)
+        self._templates = {
+            key: CompiledTemplate(
+                subject=text_env.from_string(source["subject"]),
+                text=text_env.from_string(source["text"]),
+                html=html_env.from_string(source["html"]),
+            )
+            for key, source in (templates or TEMPLATES).items()
+        }
+
+        self._headers = (
+            f"From: {sender}\r\n"
+            "MIME-Version: 1.0\r\n"
+            f'Content-Type: multipart/alternative; boundary="{BOUNDARY}"\r\n'
+        )
+        part = (
+            f"--{BOUNDARY}\r\n"
+            "Content-Type: text/{subtype}; charset=\"utf-8\"\r\n"
+            "Content-Transfer-Encoding: base64\r\n\r\n"
+        )
+        self._text_part = part.format(subtype="plain")
+        self._html_part = part.format(subtype="html")
+
+    def get(self, event: str, locale: Optional[str] = None) -> CompiledTemplate:
+        """Return the template for an event, falling back by locale then event."""
+        for key in (
+            (event, locale),
+            (event, self.default_locale),
+            ("default", locale),
+            ("default", self.default_locale),
+        ):
+            template = self._templates.get(key)
+            if template is not None:
+                return template
+        raise KeyError(f"No email template for event {event!r}")
+
+    def render(self, data: dict[str, Any]) -> tuple[str, str]:
+        """Render an email-send message.
+
+        Args:
+            data: Message with 'email', 'event', optional 'locale',
+                'message_id' and template fields
+
+        Returns:
+            Tuple of (recipient, full RFC 5322 message)
+
+        Raises:
+            InvalidMessageError: The recipient or message ID contains a line break
+        """
+        context = {
+            "event": "unknown",
+            "first_name": "",
+            "last_name": "",
+            "registered_at": "",
+            **data,
+        }
+        template = self.get(context["event"], data.get("locale"))
+        to_email = _single_line("recipient", data["email"])
+
+        headers = self._headers + (
+            f"To: {to_email}\r\n"
+            f"Subject: {_encode_header(template.subject.render(context))}\r\n"
+            f"Date: {formatdate(localtime=False)}\r\n"
+        )
+        if data.get("message_id"):
+            message_id = _single_line("message ID", data["message_id"])
+            headers += f"Message-ID: <{message_id}@cdv-webapp.local>\r\n"
+
+        return to_email, (
+            f"{headers}\r\n"
+            f"{self._text_part}{_encode_body(template.text.render(context))}"
+            f"{self._html_part}{_encode_body(template.html.render(context))}"
+            f"--{BOUNDARY}--\r\n"
+        )
@@ -0,0 +1,99 @@
+"""Long-lived SMTP session for the email consumer.
+
+Opening a connection per message costs a TCP handshake plus the
+greeting/EHLO exchange, which dominates sending time. SmtpSession keeps
+one connection open, checks it with NOOP after it has been idle,
+reconnects when the server has dropped it and recycles it after a fixed
+number of messages so server-side per-connection limits are never hit.
+"""
+
+import logging
+import smtplib
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SmtpSession:
+    """A reusable SMTP connection; not thread-safe (use one per worker).
+
+    Attributes:
+        host: SMTP server host
+        port: SMTP server port
+        max_messages: Messages sent before the connection is recycled
+        idle_timeout: Seconds idle after which the connection is probed
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_messages: int = 100,
+        idle_timeout: float = 30.0,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._sent = 0
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        self.close()
+        self._smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        self._sent = 0
+        logger.debug(f"Opened SMTP connection to {self.host}:{self.port}")
+        return self._smtp
+
+    def _connection(self) -> smtplib.SMTP:
+        """Return a usable connection, opening or recycling one if needed."""
+        if self._smtp is None or self._sent >= self.max_messages:
+            return self._connect()
+
+        if time.monotonic() - self._last_used > self.idle_timeout:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            return self._connect()
+
+        return self._smtp
+
+    def sendmail(self, from_addr: str, to_addrs, msg: str) -> None:
+        """Send a message, reconnecting once if the server dropped the session.
+
+        Args:
+            from_addr: Envelope sender
+            to_addrs: Envelope recipient(s)
+            msg: Full message as a string
+
+        Raises:
+            smtplib.SMTPException: If the message is rejected or the retry fails
+        """
+        smtp = self._connection()
+        try:
+            smtp.sendmail(from_addr, to_addrs, msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Stale connection (server timeout or restart): retry on a new one
+            self._connect().sendmail(from_addr, to_addrs, msg)
+
+        self._sent += 1
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        """Quit the current connection, if any."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
@@ -4,7 +4,8 @@ from datetime import datetime, timezone
 from decimal import Decimal
 
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.passwords import password_hasher
 
 db = SQLAlchemy()
 
@@ -50,10 +51,12 @@ class User(db.Model):
     def set_password(self, password: str) -> None:
         """Hash and set the user's password.
 
+        Hashing runs in the password worker pool.
+
         Args:
             password: Plain text password to hash
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
         """Verify a password against the stored hash.
@@ -64,7 +67,11 @@ class User(db.Model):
         Returns:
             True if password matches, False otherwise
         """
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        """Whether the stored hash uses outdated method or cost parameters."""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self, include_balance: bool = False) -> dict:
         """Convert user object to dictionary.
@@ -92,3 +99,32 @@ class User(db.Model):
     def __repr__(self) -> str:
         """String representation of User."""
         return f"<User {self.email}>"
+
+
+class OutboxMessage(db.Model):
+    """Message waiting to be published to RabbitMQ by the outbox relay.
+
+    Rows are written in the same transaction as the change that produced
+    the event and deleted by the relay once the broker has accepted them.
+
+    Attributes:
+        id: Primary key (also the publish order)
+        queue: Destination queue
+        payload: JSON message body
+        created_at: Timestamp the event was recorded
+    """
+
+    __tablename__ = "outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(255), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self) -> str:
+        """String representation of OutboxMessage."""
+        return f"<OutboxMessage {self.id} -> {self.queue}>"
@@ -0,0 +1,137 @@
+"""Transactional outbox relay.
+
+Events are stored in the ``outbox`` table by the transaction that
+produced them (see UserService.create_user) and published to RabbitMQ
+here. Each batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so
+several relays can run side by side on PostgreSQL; rows are deleted only
+after the broker has committed the batch, so delivery is at-least-once.
+SQLite ignores the row locks, so run a single relay there.
+
+Registration only inserts a row, so it never waits on the broker: the
+table is the durable buffer while RabbitMQ is down, outbox_lag() reports
+the backlog, and a stopped relay finishes its current batch first.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.models import OutboxMessage, db
+from app.rabbitmq import publish_batch
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_lag() -> float:
+    """Return the age in seconds of the oldest unpublished event (0 if none)."""
+    oldest = (
+        db.session.query(OutboxMessage.created_at)
+        .order_by(OutboxMessage.id)
+        .limit(1)
+        .scalar()
+    )
+    if oldest is None:
+        return 0.0
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    return max((datetime.now(timezone.utc) - oldest).total_seconds(), 0.0)
+
+
+class OutboxRelay:
+    """Moves outbox rows to RabbitMQ in batches.
+
+    Attributes:
+        batch_size: Maximum rows claimed per transaction
+        poll_interval: Seconds to sleep when the outbox is drained
+        report_interval: Seconds between throughput/lag log lines
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        poll_interval: float = 0.5,
+        report_interval: float = 30.0,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.report_interval = report_interval
+        self.relayed = 0
+        self._stopping = False
+
+    def relay_batch(self) -> Optional[int]:
+        """Claim, publish and delete one batch of outbox rows.
+
+        Returns:
+            Number of rows relayed, or None if publishing failed (the rows
+            stay in the outbox and are retried)
+        """
+        rows = (
+            db.session.query(OutboxMessage)
+            .order_by(OutboxMessage.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            db.session.rollback()
+            return 0
+
+        by_queue: dict[str, list] = {}
+        for row in rows:
+            by_queue.setdefault(row.queue, []).append(row.payload)
+
+        for queue, payloads in by_queue.items():
+            if not publish_batch(queue, payloads):
+                db.session.rollback()
+                return None
+
+        db.session.query(OutboxMessage).filter(
+            OutboxMessage.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        self.relayed += len(rows)
+        return len(rows)
+
+    def stop(self, *_args) -> None:
+        """Stop run() once the current batch is published (signal-safe)."""
+        self._stopping = True
+
+    def _sleep(self, seconds: float) -> None:
+        deadline = time.monotonic() + seconds
+        while not self._stopping and time.monotonic() < deadline:
+            time.sleep(min(deadline - time.monotonic(), 0.2))
+
+    def run(self) -> None:
+        """Relay until stop(), backing off while the broker is down.
+
+        Must be called inside an application context.
+        """
+        backoff = 0.0
+        last_report = time.monotonic()
+        reported = 0
+
+        while not self._stopping:
+            relayed = self.relay_batch()
+            if relayed is None:
+                backoff = min(max(backoff * 2, 1.0), 30.0)
+                logger.warning(f"Outbox publish failed; retrying in {backoff:.0f}s")
+                self._sleep(backoff)
+                continue
+            backoff = 0.0
+
+            now = time.monotonic()
+            if now - last_report >= self.report_interval:
+                rate = (self.relayed - reported) / (now - last_report)
+                logger.info(
+                    f"Outbox relay: {rate:.1f} msg/s, lag {outbox_lag():.1f}s, "
+                    f"{self.relayed} relayed total"
+                )
+                last_report, reported = now, self.relayed
+
+            # A full batch means more are waiting
+            if relayed < self.batch_size:
+                self._sleep(self.poll_interval)
+
+        logger.info(f"Outbox relay stopped, {self.relayed} relayed total")
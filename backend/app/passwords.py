@@ -0,0 +1,192 @@
+"""Password hashing offloaded to a bounded process pool.
+
+Hashing and verification are CPU-bound, so they run in worker processes
+instead of blocking the request thread. The algorithm and cost come from
+config (``PASSWORD_HASH_METHOD``) and hashes created with older parameters
+are reported by needs_rehash() so they can be upgraded on login.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from flask import Flask
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_chunk(passwords: list[str], method: str, salt_length: int) -> list[str]:
+    """Hash a chunk of passwords in a worker process."""
+    return [generate_password_hash(password, method, salt_length) for password in passwords]
+
+
+class PasswordHasher:
+    """Runs werkzeug hashing in a process pool with a cap on queued jobs.
+
+    Attributes:
+        method: werkzeug hash method, e.g. 'scrypt' or 'pbkdf2:sha256:600000'
+        salt_length: Salt length passed to generate_password_hash
+        workers: Pool size (0 hashes inline on the calling thread)
+        max_pending: Maximum jobs submitted but not yet finished
+        max_bulk_pending: Maximum hash_many() chunks submitted but not yet
+            finished (half of max_pending)
+    """
+
+    def __init__(
+        self,
+        method: str = "scrypt",
+        salt_length: int = 16,
+        workers: int = 0,
+        max_pending: Optional[int] = None,
+    ):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._bulk_executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self.configure(method, salt_length, workers, max_pending)
+
+    def configure(
+        self,
+        method: str,
+        salt_length: int,
+        workers: int,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        """(Re)apply hashing parameters, shutting down any running pool."""
+        self.shutdown()
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.max_pending = max_pending or max(workers, 1) * 8
+        self.max_bulk_pending = max(1, self.max_pending // 2)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._bulk_slots = threading.BoundedSemaphore(self.max_bulk_pending)
+        self._prefix: Optional[str] = None
+
+    def _get_executor(self, bulk: bool = False) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Pools inherited across fork belong to the parent
+                self._executor = self._bulk_executor = None
+                self._pid = os.getpid()
+            if bulk:
+                if self._bulk_executor is None:
+                    self._bulk_executor = self._new_executor()
+                return self._bulk_executor
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        with self._slots:
+            return self._get_executor().submit(fn, *args).result()
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method.
+
+        Args:
+            password: Plain text password
+
+        Returns:
+            werkzeug-formatted password hash
+        """
+        return self._run(
+            generate_password_hash, password, self.method, self.salt_length
+        )
+
+    def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hash many passwords in parallel across the pool.
+
+        Passwords are sent to the workers in chunks (a few per worker), so
+        the per-job IPC cost is amortized. Chunks run in a separate pool,
+        started on first use, and at most max_bulk_pending of them are in
+        flight: hash() and verify() never queue behind an import and only
+        share the CPU with it.
+
+        Args:
+            passwords: Plain text passwords
+
+        Returns:
+            Hashes in the same order
+        """
+        if self.workers <= 0 or len(passwords) <= 1:
+            return [self.hash(password) for password in passwords]
+
+        size = min(max(math.ceil(len(passwords) / (self.workers * 4)), 1), 64)
+        executor = self._get_executor(bulk=True)
+        slots = self._bulk_slots
+        futures = []
+        for start in range(0, len(passwords), size):
+            slots.acquire()
+            future = executor.submit(
+                _hash_chunk, passwords[start:start + size], self.method, self.salt_length
+            )
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        return [password_hash for future in futures for password_hash in future.result()]
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Verify a password against a stored hash.
+
+        Args:
+            password_hash: Stored werkzeug password hash
+            password: Plain text password
+
+        Returns:
+            True if password matches, False otherwise
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a hash was created with different method or cost."""
+        if self._prefix is None:
+            # Normalized method string, e.g. 'scrypt:32768:8:1'
+            sample = generate_password_hash("", self.method, 1)
+            self._prefix = sample.split("$", 1)[0]
+        return password_hash.split("$", 1)[0] != self._prefix
+
+    def shutdown(self) -> None:
+        """Stop the worker pools, if any."""
+        with self._lock:
+            if self._pid == os.getpid():
+                for executor in (self._executor, self._bulk_executor):
+                    if executor is not None:
+                        executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._bulk_executor = None
+
+
+# Global hasher instance, configured by init_passwords()
+password_hasher = PasswordHasher()
+
+
+def init_passwords(app: Flask) -> None:
+    """Configure password hashing from Flask app config.
+
+    Args:
+        app: Flask application instance
+    """
+    password_hasher.configure(
+        method=app.config.get("PASSWORD_HASH_METHOD", "scrypt"),
+        salt_length=app.config.get("PASSWORD_SALT_LENGTH", 16),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", 0),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING"),
+    )
+    logger.info(
+        "Password hashing: method=%s workers=%d",
+        password_hasher.method,
+        password_hasher.workers,
+    )
@@ -1,59 +1,362 @@
-"""RabbitMQ publisher module (fire-and-forget)."""
+"""RabbitMQ publisher module.
+
+pika's BlockingConnection is not thread-safe, so each request thread
+borrows a connection/channel pair from a small pool instead of sharing a
+global one. Queues are declared once per connection, and messages are
+published in AMQP transactions: a whole batch is confirmed by the broker
+with a single ``tx.commit`` round trip.
+
+Request handlers do not publish directly: events are written to the
+transactional outbox and published here by the outbox relay.
+"""
 
 import json
 import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Optional
 
 import pika
-from flask import current_app
+from flask import Flask
 
 logger = logging.getLogger(__name__)
 
-_connection = None
-_channel = None
 
+class PooledChannel:
+    """A connection with one transactional channel, used by one thread at a time.
+
+    Attributes:
+        connection: Underlying BlockingConnection
+        channel: Channel in transaction mode
+        declared: Queues already declared on this connection
+        used: Whether a batch has been committed on this connection
+    """
+
+    def __init__(self, params: pika.ConnectionParameters):
+        self.connection = pika.BlockingConnection(params)
+        self.channel = self.connection.channel()
+        self.channel.tx_select()
+        self.declared: set[str] = set()
+        self.used = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.connection.is_open and self.channel.is_open
+
+    def declare(self, queue: str) -> None:
+        """Declare a durable queue unless it was declared on this connection."""
+        if queue not in self.declared:
+            self.channel.queue_declare(queue=queue, durable=True)
+            self.declared.add(queue)
+
+    def publish_batch(self, queue: str, bodies: list[bytes]) -> None:
+        """Publish persistent messages and wait for the broker to commit them."""
+        self.declare(queue)
+        properties = pika.BasicProperties(
+            content_type="application/json", delivery_mode=2
+        )
+        for body in bodies:
+            self.channel.basic_publish(
+                exchange="", routing_key=queue, body=body, properties=properties
+            )
+        self.channel.tx_commit()
+        self.used = True
+
+    def close(self) -> None:
+        try:
+            if self.connection.is_open:
+                self.connection.close()
+        except Exception:
+            pass
+
+
+class ChannelPool:
+    """Bounded pool of PooledChannels shared by request threads.
+
+    Idle connections are checked (and their heartbeats serviced) when they
+    are borrowed. After a fork the inherited connections are dropped and
+    the child opens its own.
+
+    Attributes:
+        size: Maximum number of connections
+    """
+
+    def __init__(self, size: int = 4):
+        self._lock = threading.Lock()
+        self._params: Optional[pika.ConnectionParameters] = None
+        self._idle: list[PooledChannel] = []
+        self._pid = os.getpid()
+        self.configure(None, size)
+
+    def configure(
+        self, params: Optional[pika.ConnectionParameters], size: int
+    ) -> None:
+        """Set connection parameters and pool size, closing idle connections."""
+        self.close()
+        self._params = params
+        self.size = max(size, 1)
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _take_idle(self) -> Optional[PooledChannel]:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Sockets inherited from the parent; never touch them
+                self._idle = []
+                self._pid = os.getpid()
+            return self._idle.pop() if self._idle else None
+
+    def _checkout(self) -> PooledChannel:
+        pooled = self._take_idle()
+        while pooled is not None:
+            try:
+                pooled.connection.process_data_events(time_limit=0)
+                if pooled.is_open:
+                    return pooled
+            except Exception:
+                pass
+            pooled.close()
+            pooled = self._take_idle()
+
+        if self._params is None:
+            raise RuntimeError("RabbitMQ publisher is not configured")
+        return PooledChannel(self._params)
 
-def _get_channel():
-    """Return a reusable channel, reconnecting if necessary."""
-    global _connection, _channel
+    @contextmanager
+    def acquire(self):
+        """Borrow a channel; it is discarded instead of returned if the block fails.
 
-    if _channel is not None and _channel.is_open:
-        return _channel
+        Yields:
+            PooledChannel for exclusive use by the calling thread
+        """
+        with self._slots:
+            pooled = self._checkout()
+            try:
+                yield pooled
+            except Exception:
+                pooled.close()
+                raise
+            with self._lock:
+                if pooled.is_open and self._pid == os.getpid():
+                    self._idle.append(pooled)
+                else:
+                    pooled.close()
 
-    if _connection is not None and _connection.is_open:
-        _connection.close()
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            owned = self._pid == os.getpid()
+        if owned:
+            for pooled in idle:
+                pooled.close()
 
+
+# Global channel pool, configured by init_rabbitmq()
+_pool = ChannelPool()
+
+
+def connection_parameters(app: Flask) -> pika.ConnectionParameters:
+    """Build broker connection parameters from Flask app config."""
     credentials = pika.PlainCredentials(
-        current_app.config["RABBITMQ_USER"],
-        current_app.config["RABBITMQ_PASS"],
+        app.config["RABBITMQ_USER"],
+        app.config["RABBITMQ_PASS"],
     )
-    params = pika.ConnectionParameters(
-        host=current_app.config["RABBITMQ_HOST"],
-        port=current_app.config["RABBITMQ_PORT"],
+    return pika.ConnectionParameters(
+        host=app.config["RABBITMQ_HOST"],
+        port=app.config["RABBITMQ_PORT"],
         credentials=credentials,
     )
 
-    _connection = pika.BlockingConnection(params)
-    _channel = _connection.channel()
-    return _channel
+
+def init_rabbitmq(app: Flask) -> None:
+    """Configure the publisher from Flask app config.
+
+    Connections are opened lazily on first publish.
+
+    Args:
+        app: Flask application instance
+    """
+    _pool.configure(
+        connection_parameters(app), app.config.get("RABBITMQ_POOL_SIZE", 4)
+    )
+
+
+def publish_batch(queue: str, messages: Iterable[Any]) -> bool:
+    """Publish JSON messages to the given queue, confirmed as one batch.
+
+    Returns True once the broker has committed every message, False on
+    failure. A pooled connection that went stale while idle is replaced
+    and the batch retried. Errors are logged but never propagated.
+    """
+    bodies = [json.dumps(message).encode() for message in messages]
+    if not bodies:
+        return True
+
+    while True:
+        reused = False
+        try:
+            with _pool.acquire() as pooled:
+                reused = pooled.used
+                pooled.publish_batch(queue, bodies)
+            logger.info("Published %d message(s) to queue '%s'", len(bodies), queue)
+            return True
+        except pika.exceptions.AMQPConnectionError:
+            if reused:
+                # The broker dropped an idle pooled connection; retry on a new one
+                continue
+            logger.exception("Failed to publish message to queue '%s'", queue)
+        except Exception:
+            logger.exception("Failed to publish message to queue '%s'", queue)
+        return False
 
 
-def publish_message(queue, message):
+def publish_message(queue: str, message: Any) -> bool:
     """Publish a JSON message to the given queue.
 
     Returns True on success, False on failure.
     Errors are logged but never propagated.
     """
-    try:
-        channel = _get_channel()
-        channel.queue_declare(queue=queue, durable=True)
-        channel.basic_publish(
-            exchange="",
-            routing_key=queue,
-            body=json.dumps(message),
-            properties=pika.BasicProperties(delivery_mode=2),
+    return publish_batch(queue, [message])
+
+
+# ---------------------------------------------------------------------------
+# Email queue topology: delayed retries and dead-lettering
+# ---------------------------------------------------------------------------
+
+EMAIL_QUEUE = "email-send"
+EMAIL_DEAD_LETTER_QUEUE = "email-send.dlq"
+RETRY_COUNT_HEADER = "x-retry-count"
+
+
+def retry_queue_name(delay: float) -> str:
+    """Name of the delay queue for a retry tier (the TTL is part of its identity)."""
+    return f"{EMAIL_QUEUE}.retry.{int(delay * 1000)}ms"
+
+
+def declare_email_queues(channel, retry_delays: list[float]) -> None:
+    """Declare the email queue, one TTL delay queue per retry tier and the DLQ.
+
+    Messages in a delay queue expire after the tier's delay and are
+    dead-lettered back to the email queue through the default exchange.
+
+    Args:
+        channel: pika channel
+        retry_delays: Delay in seconds of each retry tier, in order
+    """
+    channel.queue_declare(queue=EMAIL_QUEUE, durable=True)
+    channel.queue_declare(queue=EMAIL_DEAD_LETTER_QUEUE, durable=True)
+    for delay in retry_delays:
+        channel.queue_declare(
+            queue=retry_queue_name(delay),
+            durable=True,
+            arguments={
+                "x-message-ttl": int(delay * 1000),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": EMAIL_QUEUE,
+            },
         )
-        logger.info("Published message to queue '%s'", queue)
-        return True
-    except Exception:
-        logger.exception("Failed to publish message to queue '%s'", queue)
-        return False
+
+
+def retry_or_dead_letter(
+    channel,
+    properties: pika.BasicProperties,
+    body: bytes,
+    retry_delays: list[float],
+    error: Optional[str] = None,
+    dead_letter: bool = False,
+) -> str:
+    """Republish a failed message to its next retry tier, or to the DLQ.
+
+    Must run on the thread owning the channel, before the original
+    delivery is acked. The channel must be in confirm mode
+    (``confirm_delivery()``), so this returns only once the broker has
+    taken the message and the delivery can be acked safely.
+
+    Args:
+        channel: pika channel
+        properties: Properties of the failed delivery
+        body: Message body
+        retry_delays: Delay in seconds of each retry tier
+        error: Reason recorded in the x-error header
+        dead_letter: Skip the retries (for messages that can never succeed)
+
+    Returns:
+        Name of the queue the message was published to
+
+    Raises:
+        pika.exceptions.NackError: The broker refused the message
+        pika.exceptions.UnroutableError: The target queue does not exist
+    """
+    headers = dict(properties.headers or {})
+    attempt = int(headers.get(RETRY_COUNT_HEADER, 0))
+    if error is not None:
+        headers["x-error"] = error[:255]
+
+    if not dead_letter and attempt < len(retry_delays):
+        headers[RETRY_COUNT_HEADER] = attempt + 1
+        target = retry_queue_name(retry_delays[attempt])
+    else:
+        target = EMAIL_DEAD_LETTER_QUEUE
+
+    channel.basic_publish(
+        exchange="",
+        routing_key=target,
+        body=body,
+        properties=pika.BasicProperties(
+            content_type=properties.content_type,
+            delivery_mode=2,
+            headers=headers,
+        ),
+        mandatory=True,
+    )
+    return target
+
+
+def replay_dead_letters(channel, limit: Optional[int] = None, batch_size: int = 100) -> int:
+    """Move dead-lettered emails back to the email queue with a fresh retry budget.
+
+    Each batch is moved in one AMQP transaction (publishes plus the
+    multiple ack), so a message is never lost or duplicated by a crash
+    mid-batch.
+
+    Args:
+        channel: pika channel (switched to transaction mode)
+        limit: Maximum messages to replay (None for all)
+        batch_size: Messages per transaction
+
+    Returns:
+        Number of messages replayed
+    """
+    channel.tx_select()
+    replayed = 0
+    while limit is None or replayed < limit:
+        want = batch_size if limit is None else min(batch_size, limit - replayed)
+        last_tag = None
+        for _ in range(want):
+            method, properties, body = channel.basic_get(EMAIL_DEAD_LETTER_QUEUE)
+            if method is None:
+                break
+            headers = {
+                key: value
+                for key, value in (properties.headers or {}).items()
+                if key not in (RETRY_COUNT_HEADER, "x-error")
+            }
+            channel.basic_publish(
+                exchange="",
+                routing_key=EMAIL_QUEUE,
+                body=body,
+                properties=pika.BasicProperties(
+                    content_type=properties.content_type,
+                    delivery_mode=2,
+                    headers=headers or None,
+                ),
+            )
+            last_tag = method.delivery_tag
+            replayed += 1
+
+        if last_tag is None:
+            break
+        channel.basic_ack(delivery_tag=last_tag, multiple=True)
+        channel.tx_commit()
+    return replayed
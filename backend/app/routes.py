@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify
 
-from app.redis_client import get_redis
+from app.outbox import outbox_lag
+from app.redis_client import cache_stats, get_redis
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 
@@ -12,7 +13,7 @@ def hello_world():
 
 @bp.route("/health", methods=["GET"])
 def health():
-    """Health check endpoint with Redis status."""
+    """Health check endpoint with Redis status, cache counters and outbox lag."""
     redis_ok = False
     r = get_redis()
     if r:
@@ -25,4 +26,6 @@ def health():
     return jsonify({
         "status": "ok",
         "redis": "connected" if redis_ok else "unavailable",
+        "cache": cache_stats(),
+        "outbox_lag_seconds": outbox_lag(),
     }), 200
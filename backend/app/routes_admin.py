@@ -0,0 +1,58 @@
+"""Admin routes."""
+
+import io
+import json
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from app.auth import admin_token_required
+from app.user_import import FORMATS, UserImporter, detect_format
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
+
+
+@admin_bp.route("/users/import", methods=["POST"])
+@admin_token_required
+def import_users():
+    """Bulk-create users from a CSV or NDJSON request body.
+
+    The format comes from ``?format=csv|ndjson`` or the Content-Type
+    (text/csv, application/x-ndjson). CSV needs a header row with
+    first_name, last_name, email, password and optionally account_balance;
+    NDJSON has one such object per line. ``?send_emails=false`` skips the
+    registration emails.
+
+    The report is streamed as NDJSON while the import runs: one result
+    object per row (created, duplicate, invalid or error) as each batch is
+    committed, then a final ``{"summary": ...}`` line.
+
+    Returns:
+        200: NDJSON row results followed by the summary
+        400: Unknown format
+        401: Invalid admin token
+        403: Admin API disabled
+    """
+    fmt = request.args.get("format") or detect_format(content_type=request.content_type)
+    if fmt not in FORMATS:
+        return jsonify({
+            "error": "Unknown import format",
+            "details": {"format": [f"Use one of: {', '.join(FORMATS)}"]},
+        }), 400
+
+    importer = UserImporter(
+        batch_size=current_app.config["USER_IMPORT_BATCH_SIZE"],
+        send_emails=request.args.get("send_emails", "true").lower() != "false",
+    )
+    # Read the body as a stream: large files are never held in memory whole
+    stream = io.TextIOWrapper(
+        request.stream, encoding="utf-8-sig", errors="replace", newline=""
+    )
+
+    def report():
+        for result in importer.iter_results(stream, fmt):
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"summary": importer.summary}) + "\n"
+
+    return Response(
+        stream_with_context(report()), status=200, mimetype="application/x-ndjson"
+    )
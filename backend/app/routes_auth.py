@@ -1,14 +1,28 @@
 """Authentication routes."""
 
 import logging
-from datetime import datetime, timezone
+import uuid
+from typing import Optional
 
 from flask import Blueprint, current_app, jsonify, request
-from flask_jwt_extended import create_access_token, get_jwt, jwt_required
+from flask_jwt_extended import (
+    create_access_token,
+    create_refresh_token,
+    get_jwt,
+    get_jwt_identity,
+    jwt_required,
+)
 from marshmallow import ValidationError
 
-from app.rabbitmq import publish_message
-from app.redis_client import blacklist_token, rate_limit
+from app.redis_client import (
+    REFRESH_REUSED,
+    REFRESH_UNKNOWN,
+    blacklist_token,
+    consume_refresh_token,
+    rate_limit,
+    revoke_token_family,
+    store_refresh_token,
+)
 from app.schemas import LoginSchema, RegisterSchema
 from app.services import UserService
 
@@ -17,8 +31,49 @@ logger = logging.getLogger(__name__)
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 
+def _refresh_ttl() -> int:
+    """Lifetime of refresh tokens in seconds."""
+    return int(current_app.config["JWT_REFRESH_TOKEN_EXPIRES"].total_seconds())
+
+
+def _issue_tokens(user_id: int, family: Optional[str] = None) -> dict:
+    """Create an access/refresh token pair for a user.
+
+    All tokens rotated from one login share a family ID ('fam' claim), so
+    reuse of a rotated refresh token can revoke the whole family. If the
+    refresh token cannot be stored (Redis unavailable) it is left out: it
+    could never be exchanged, and the client logs in again when the access
+    token expires.
+
+    Args:
+        user_id: User's ID
+        family: Existing token family when rotating, None for a new login
+
+    Returns:
+        Dictionary with access_token and, if it was stored, refresh_token
+    """
+    family = family or uuid.uuid4().hex
+    refresh_jti = str(uuid.uuid4())
+
+    # Identity must be a string
+    access_token = create_access_token(
+        identity=str(user_id), additional_claims={"fam": family}
+    )
+    tokens = {"access_token": access_token}
+
+    if store_refresh_token(refresh_jti, family, _refresh_ttl()):
+        tokens["refresh_token"] = create_refresh_token(
+            identity=str(user_id),
+            additional_claims={"fam": family, "jti": refresh_jti},
+        )
+    else:
+        logger.warning("Refresh token not issued: refresh token store unavailable")
+
+    return tokens
+
+
 @auth_bp.route("/register", methods=["POST"])
-@rate_limit(max_requests=3, window_seconds=60, key_prefix="rl:reg")
+@rate_limit(config_key="RATE_LIMIT_REGISTER", key_prefix="rl:reg")
 def register():
     """Register a new user.
 
@@ -32,7 +87,7 @@ def register():
         }
 
     Returns:
-        201: User created successfully with user data and JWT token
+        201: User created successfully with user data and JWT tokens
         400: Validation error or user already exists
         500: Server error
     """
@@ -58,26 +113,12 @@ def register():
     if error:
         return jsonify({"error": error}), 400
 
-    try:
-        publish_message("email-send", {
-            "event": "user_registered",
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "registered_at": datetime.now(timezone.utc).isoformat(),
-        })
-    except Exception as e:
-        logger.error(f"Failed to publish registration email message for user {user.email}: {e}")
-
-    # Generate JWT token (identity must be a string)
-    access_token = create_access_token(identity=str(user.id))
-
     return (
         jsonify(
             {
                 "message": "User registered successfully",
                 "user": user.to_dict(),
-                "access_token": access_token,
+                **_issue_tokens(user.id),
             }
         ),
         201,
@@ -85,9 +126,9 @@ def register():
 
 
 @auth_bp.route("/login", methods=["POST"])
-@rate_limit(max_requests=5, window_seconds=60, key_prefix="rl:login")
+@rate_limit(config_key="RATE_LIMIT_LOGIN", key_prefix="rl:login")
 def login():
-    """Authenticate user and return JWT token.
+    """Authenticate user and return JWT access and refresh tokens.
 
     Expected JSON body:
         {
@@ -96,7 +137,7 @@ def login():
         }
 
     Returns:
-        200: Login successful with JWT token
+        200: Login successful with JWT tokens
         400: Validation error
         401: Invalid credentials
         500: Server error
@@ -120,22 +161,54 @@ def login():
     if not user:
         return jsonify({"error": "Invalid email or password"}), 401
 
-    # Generate JWT token (identity must be a string)
-    access_token = create_access_token(identity=str(user.id))
-
     return jsonify(
         {
             "message": "Login successful",
             "user": user.to_dict(),
-            "access_token": access_token,
+            **_issue_tokens(user.id),
         }
     ), 200
 
 
+@auth_bp.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    """Exchange a refresh token for a new access/refresh token pair.
+
+    Requires a refresh token in the Authorization header. Each refresh token
+    can be used once; presenting an already rotated token revokes every
+    token of that login.
+
+    Returns:
+        200: New access_token and refresh_token
+        401: Invalid, expired, revoked, reused or unknown refresh token, or
+            rotation cannot be enforced because Redis is unavailable
+    """
+    jwt_data = get_jwt()
+    family = jwt_data.get("fam")
+
+    consumed = consume_refresh_token(jwt_data["jti"])
+    if consumed is None:
+        # Without Redis a stolen refresh token could be replayed undetected
+        logger.warning("Refresh rejected: refresh token store unavailable")
+        return jsonify({"error": "Token refresh unavailable, please log in again"}), 401
+    if consumed == REFRESH_UNKNOWN:
+        # Not stored (Redis lost it or was down at login): not evidence of theft
+        logger.warning(f"Refresh rejected: unknown refresh token for family {family}")
+        return jsonify({"error": "Refresh token not recognized, please log in again"}), 401
+    if consumed == REFRESH_REUSED:
+        if family:
+            revoke_token_family(family, _refresh_ttl())
+        logger.warning(f"Refresh token reuse detected for family {family}")
+        return jsonify({"error": "Refresh token already used"}), 401
+
+    return jsonify(_issue_tokens(int(get_jwt_identity()), family)), 200
+
+
 @auth_bp.route("/logout", methods=["POST"])
 @jwt_required()
 def logout():
-    """Logout user by blacklisting their JWT token.
+    """Logout user by blacklisting their JWT token and its refresh tokens.
 
     Requires JWT authentication.
 
@@ -154,6 +227,11 @@ def logout():
     blacklist_token(jti, remaining)
     logger.info(f"Token {jti} blacklisted (expires in {remaining}s)")
 
+    # Also invalidate the refresh tokens issued with this login
+    family = jwt_data.get("fam")
+    if family:
+        revoke_token_family(family, _refresh_ttl())
+
     return jsonify({"message": "Wylogowano pomyślnie"}), 200
 
 
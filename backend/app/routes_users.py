@@ -1,41 +1,84 @@
 """User routes."""
 
-from flask import Blueprint, jsonify, request
+import hashlib
+from typing import Optional
+
+from flask import Blueprint, Response, jsonify, request
 from marshmallow import ValidationError
 
-from app.auth import jwt_required_custom
-from app.models import User
-from app.redis_client import cache_delete, cache_get, cache_set
+from app.auth import LazyUser, jwt_required_custom
+from app.redis_client import cache_get_or_compute, cache_invalidate_tags
 from app.schemas import UpdateUserSchema
 from app.services import UserService
 
 users_bp = Blueprint("users", __name__, url_prefix="/api/users")
 
 
+def _profile_key(user_id: int) -> str:
+    return f"user:{user_id}:profile:v2"
+
+
+def _balance_key(user_id: int) -> str:
+    return f"user:{user_id}:balance:v2"
+
+
+def _make_etag(*parts) -> str:
+    """Build a strong ETag from the values a response depends on."""
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def _conditional_response(entry: dict) -> Response:
+    """Answer a cached {'body', 'etag'} entry, honouring If-None-Match.
+
+    A matching If-None-Match gets an empty 304 without serializing the body.
+    Responses may only be stored by the client's private cache and must be
+    revalidated before reuse.
+    """
+    if request.if_none_match.contains_weak(entry["etag"]):
+        response = Response(status=304)
+    else:
+        response = jsonify(entry["body"])
+
+    response.set_etag(entry["etag"])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @users_bp.route("/me", methods=["GET"])
-@jwt_required_custom()
-def get_current_user(current_user: User):
+@jwt_required_custom(prefetch=[_profile_key])
+def get_current_user(current_user: LazyUser):
     """Get current user's profile.
 
-    Requires JWT authentication. Results cached in Redis for 5 minutes.
+    Requires JWT authentication. Results cached in Redis for 5 minutes;
+    a cache hit is served without loading the user from the database.
+    Only one request recomputes an expired entry; others get the stale one.
+    The ETag is derived from the user's updated_at timestamp.
 
     Returns:
         200: User profile data
+        304: Not modified (If-None-Match matches the current ETag)
         401: Unauthorized (invalid/expired token)
     """
-    cache_key = f"user:{current_user.id}:profile"
-    cached = cache_get(cache_key)
-    if cached:
-        return jsonify(cached), 200
+    def load_profile() -> dict:
+        user = current_user.to_dict()
+        return {
+            "body": {"user": user},
+            "etag": _make_etag(user["id"], user["updated_at"]),
+        }
 
-    response = {"user": current_user.to_dict()}
-    cache_set(cache_key, response, ttl=300)
-    return jsonify(response), 200
+    entry = cache_get_or_compute(
+        _profile_key(current_user.id),
+        load_profile,
+        ttl=300,
+        tags=[f"user:{current_user.id}"],
+    )
+    return _conditional_response(entry)
 
 
 @users_bp.route("/me", methods=["PUT"])
 @jwt_required_custom()
-def update_current_user(current_user: User):
+def update_current_user(current_user: LazyUser):
     """Update current user's profile.
 
     Requires JWT authentication.
@@ -77,8 +120,8 @@ def update_current_user(current_user: User):
     if error:
         return jsonify({"error": error}), 400
 
-    # Invalidate cached profile
-    cache_delete(f"user:{current_user.id}:*")
+    # Invalidate every cached response for this user
+    cache_invalidate_tags(f"user:{current_user.id}")
 
     return jsonify(
         {
@@ -89,33 +132,45 @@ def update_current_user(current_user: User):
 
 
 @users_bp.route("/me/balance", methods=["GET"])
-@jwt_required_custom()
-def get_balance(current_user: User):
+@jwt_required_custom(prefetch=[_balance_key])
+def get_balance(current_user: LazyUser):
     """Get current user's account balance.
 
-    Requires JWT authentication. Results cached in Redis for 2 minutes.
+    Requires JWT authentication. Results cached in Redis for 2 minutes;
+    a cache hit is served without loading the user from the database.
+    Only one request recomputes an expired entry; others get the stale one.
+
+    The ETag is derived from the balance value.
 
     Returns:
         200: Account balance data
+        304: Not modified (If-None-Match matches the current ETag)
         401: Unauthorized (invalid/expired token)
         404: User not found
     """
-    cache_key = f"user:{current_user.id}:balance"
-    cached = cache_get(cache_key)
-    if cached:
-        return jsonify(cached), 200
+    def load_balance() -> Optional[dict]:
+        balance, error = UserService.get_balance(current_user.id)
+        if error:
+            return None
+        return {
+            "body": {
+                "account_balance": str(balance),
+                "currency": "PLN",
+            },
+            "etag": _make_etag(current_user.id, balance),
+        }
 
-    balance, error = UserService.get_balance(current_user.id)
+    entry = cache_get_or_compute(
+        _balance_key(current_user.id),
+        load_balance,
+        ttl=120,
+        tags=[f"user:{current_user.id}"],
+    )
 
-    if error:
-        return jsonify({"error": error}), 404
-
-    response = {
-        "account_balance": str(balance),
-        "currency": "PLN",
-    }
-    cache_set(cache_key, response, ttl=120)
-    return jsonify(response), 200
+    if entry is None:
+        return jsonify({"error": "User not found"}), 404
+
+    return _conditional_response(entry)
 
 
 @users_bp.errorhandler(404)
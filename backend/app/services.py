@@ -1,11 +1,27 @@
 """Business logic services."""
 
+import uuid
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Optional
 
 from sqlalchemy.exc import IntegrityError
 
-from app.models import User, db
+from app.models import OutboxMessage, User, db
+from app.user_cache import user_cache
+
+
+def registration_event(email: str, first_name: str, last_name: str) -> dict:
+    """Payload of the email-send message announcing a new user."""
+    return {
+        # Idempotency key: the consumer sends each ID only once
+        "message_id": str(uuid.uuid4()),
+        "event": "user_registered",
+        "email": email,
+        "first_name": first_name,
+        "last_name": last_name,
+        "registered_at": datetime.now(timezone.utc).isoformat(),
+    }
 
 
 class UserService:
@@ -21,6 +37,9 @@ class UserService:
     ) -> tuple[Optional[User], Optional[str]]:
         """Create a new user.
 
+        The registration email event is written to the outbox in the same
+        transaction, so it is published if and only if the user exists.
+
         Args:
             first_name: User's first name
             last_name: User's last name
@@ -46,7 +65,12 @@ class UserService:
             user.set_password(password)
 
             db.session.add(user)
+            db.session.add(OutboxMessage(
+                queue="email-send",
+                payload=registration_event(email, first_name, last_name),
+            ))
             db.session.commit()
+            user_cache.put(user)
 
             return user, None
 
@@ -61,30 +85,47 @@ class UserService:
     def get_by_id(user_id: int) -> Optional[User]:
         """Get user by ID.
 
+        Reads through the User entity cache before querying the database.
+
         Args:
             user_id: User's ID
 
         Returns:
             User object if found, None otherwise
         """
-        return User.query.get(user_id)
+        user = user_cache.get_by_id(user_id)
+        if user is None:
+            user = User.query.get(user_id)
+            if user is not None:
+                user_cache.put(user)
+        return user
 
     @staticmethod
     def get_by_email(email: str) -> Optional[User]:
         """Get user by email.
 
+        Reads through the User entity cache before querying the database.
+
         Args:
             email: User's email address
 
         Returns:
             User object if found, None otherwise
         """
-        return User.query.filter_by(email=email).first()
+        user = user_cache.get_by_email(email)
+        if user is None:
+            user = User.query.filter_by(email=email).first()
+            if user is not None:
+                user_cache.put(user)
+        return user
 
     @staticmethod
     def authenticate(email: str, password: str) -> Optional[User]:
         """Authenticate a user.
 
+        On success, a hash created with outdated parameters is transparently
+        replaced by one using the current PASSWORD_HASH_METHOD.
+
         Args:
             email: User's email address
             password: Plain text password
@@ -93,9 +134,19 @@ class UserService:
             User object if authentication successful, None otherwise
         """
         user = UserService.get_by_email(email)
-        if user and user.check_password(password):
-            return user
-        return None
+        if not user or not user.check_password(password):
+            return None
+
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+                user_cache.invalidate(user.id)
+                user_cache.put(user)
+            except Exception:
+                db.session.rollback()
+
+        return user
 
     @staticmethod
     def update_user(
@@ -120,6 +171,8 @@ class UserService:
         if not user:
             return None, "User not found"
 
+        old_email = user.email
+
         try:
             # Check if email is being changed and if it's already taken
             if email and email != user.email:
@@ -135,6 +188,8 @@ class UserService:
                 user.last_name = last_name
 
             db.session.commit()
+            user_cache.invalidate(user_id, old_email)
+            user_cache.put(user)
             return user, None
 
         except IntegrityError:
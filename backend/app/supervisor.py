@@ -0,0 +1,318 @@
+"""Autoscaling supervisor for email consumer processes.
+
+The supervisor polls the depth of the email-send queue (and, if the
+RabbitMQ management API is configured, its consumer utilisation) and
+keeps between ``min_procs`` and ``max_procs`` consumer processes running.
+Scaling up reacts within one poll; scaling down needs the lower target to
+hold for several polls in a row and happens one process at a time, so a
+short lull in a burst does not retire workers. Retired processes get
+SIGTERM and drain their in-flight messages before exiting.
+
+Each process gets the lowest free slot number; with ``metrics_port`` set,
+it serves its metrics on ``metrics_port + slot`` so a fixed port range
+can be scraped. Slots then stay below ``max_procs``, and draining
+processes keep theirs until they exit, so a scale-up that finds every
+slot held waits for the next poll.
+"""
+
+import base64
+import json
+import logging
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from typing import Optional
+
+import pika
+
+logger = logging.getLogger(__name__)
+
+
+class ScalingPolicy:
+    """Decides how many consumer processes to run.
+
+    Attributes:
+        min_procs: Lower bound on processes
+        max_procs: Upper bound on processes
+        target_backlog: Queued messages one process is expected to absorb
+        scale_down_after: Consecutive polls below target before retiring one
+        high_utilisation: Add a process when utilisation is at least this
+            and messages are waiting
+        low_utilisation: Only retire processes below this utilisation
+        cooldown: Seconds after any change before scaling down again
+    """
+
+    def __init__(
+        self,
+        min_procs: int = 1,
+        max_procs: int = 8,
+        target_backlog: int = 100,
+        scale_down_after: int = 6,
+        high_utilisation: float = 0.9,
+        low_utilisation: float = 0.5,
+        cooldown: float = 30.0,
+    ):
+        self.min_procs = max(min_procs, 0)
+        self.max_procs = max(max_procs, self.min_procs)
+        self.target_backlog = max(target_backlog, 1)
+        self.scale_down_after = scale_down_after
+        self.high_utilisation = high_utilisation
+        self.low_utilisation = low_utilisation
+        self.cooldown = cooldown
+        self._below = 0
+        self._last_change = float("-inf")
+
+    def _clamp(self, n: int) -> int:
+        return min(max(n, self.min_procs), self.max_procs)
+
+    def desired(
+        self,
+        current: int,
+        depth: int,
+        utilisation: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """Return the process count to run after this poll.
+
+        Args:
+            current: Processes running now
+            depth: Messages ready in the queue
+            utilisation: Consumer utilisation 0..1, if known
+            now: Monotonic time (for tests)
+
+        Returns:
+            New process count
+        """
+        now = time.monotonic() if now is None else now
+        target = self._clamp(math.ceil(depth / self.target_backlog))
+        if (
+            utilisation is not None
+            and utilisation >= self.high_utilisation
+            and depth > 0
+        ):
+            target = max(target, self._clamp(current + 1))
+
+        if target > current or current < self.min_procs:
+            self._below = 0
+            self._last_change = now
+            return self._clamp(target)
+
+        if target < current:
+            busy = utilisation is not None and utilisation >= self.low_utilisation
+            self._below = 0 if busy else self._below + 1
+            if (
+                self._below >= self.scale_down_after
+                and now - self._last_change >= self.cooldown
+            ):
+                self._below = 0
+                self._last_change = now
+                return self._clamp(current - 1)
+            return current
+
+        self._below = 0
+        return self._clamp(current)
+
+
+class QueueMonitor:
+    """Reads queue depth over AMQP and utilisation from the management API."""
+
+    def __init__(
+        self,
+        params: pika.ConnectionParameters,
+        queue: str,
+        management_url: Optional[str] = None,
+    ):
+        self.params = params
+        self.queue = queue
+        self.management_url = management_url
+        self._connection = None
+        self._channel = None
+
+    def depth(self) -> int:
+        """Return the number of ready messages (raises if the broker is down)."""
+        if self._channel is None or not self._channel.is_open:
+            if self._connection is not None and self._connection.is_open:
+                self._connection.close()
+            self._connection = pika.BlockingConnection(self.params)
+            self._channel = self._connection.channel()
+        try:
+            result = self._channel.queue_declare(
+                queue=self.queue, durable=True, passive=True
+            )
+        except Exception:
+            self._channel = None
+            raise
+        return result.method.message_count
+
+    def utilisation(self) -> Optional[float]:
+        """Return consumer utilisation (0..1), or None when unavailable."""
+        if not self.management_url:
+            return None
+
+        parsed = urllib.parse.urlsplit(self.management_url)
+        url = (
+            f"{parsed.scheme}://{parsed.hostname}:{parsed.port or 15672}"
+            f"/api/queues/%2F/{urllib.parse.quote(self.queue, safe='')}"
+        )
+        request = urllib.request.Request(url)
+        if parsed.username:
+            token = base64.b64encode(
+                f"{parsed.username}:{parsed.password or ''}".encode()
+            ).decode()
+            request.add_header("Authorization", f"Basic {token}")
+        try:
+            with urllib.request.urlopen(request, timeout=2) as response:
+                data = json.load(response)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Management API unavailable: {e}")
+            return None
+        value = data.get("consumer_utilisation")
+        return float(value) if value is not None else None
+
+    def close(self) -> None:
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
+
+
+class Supervisor:
+    """Runs and scales consumer processes according to a ScalingPolicy.
+
+    Attributes:
+        command: argv of one consumer process
+        drain_timeout: Seconds a retired process may take to drain before SIGKILL
+        poll_interval: Seconds between queue polls
+        metrics_port: First consumer metrics port (0 = leave unset)
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        policy: ScalingPolicy,
+        monitor: QueueMonitor,
+        poll_interval: float = 5.0,
+        drain_timeout: float = 30.0,
+        metrics_port: int = 0,
+    ):
+        self.command = command
+        self.policy = policy
+        self.monitor = monitor
+        self.poll_interval = poll_interval
+        self.drain_timeout = drain_timeout
+        self.metrics_port = metrics_port
+        self._procs: list[subprocess.Popen] = []
+        # Slot of every live process, draining ones included (their ports
+        # are still bound)
+        self._slots: dict[subprocess.Popen, int] = {}
+        # Processes told to stop, with their SIGKILL deadline
+        self._draining: list[tuple[subprocess.Popen, float]] = []
+        self._stopping = False
+
+    def _spawn(self) -> bool:
+        """Start one process; False if no metrics port is free yet."""
+        used = set(self._slots.values())
+        limit = self.policy.max_procs if self.metrics_port else len(used) + 1
+        slot = next((n for n in range(limit) if n not in used), None)
+        if slot is None:
+            logger.info("All metrics ports are held by draining consumers; waiting")
+            return False
+
+        env = None
+        if self.metrics_port:
+            env = {**os.environ, "EMAIL_CONSUMER_METRICS_PORT": str(self.metrics_port + slot)}
+
+        proc = subprocess.Popen(self.command, env=env)
+        self._procs.append(proc)
+        self._slots[proc] = slot
+        logger.info(
+            f"Started consumer pid={proc.pid} slot={slot} ({len(self._procs)} running)"
+        )
+        return True
+
+    def _retire(self) -> None:
+        # Newest first: the oldest processes have warm SMTP sessions
+        proc = self._procs.pop()
+        proc.send_signal(signal.SIGTERM)
+        self._draining.append((proc, time.monotonic() + self.drain_timeout))
+        logger.info(f"Draining consumer pid={proc.pid} ({len(self._procs)} running)")
+
+    def _reap(self) -> None:
+        """Forget exited processes; kill drains that overran their deadline."""
+        for proc in [p for p in self._procs if p.poll() is not None]:
+            logger.warning(f"Consumer pid={proc.pid} exited with {proc.returncode}")
+            self._procs.remove(proc)
+            self._slots.pop(proc, None)
+
+        still_draining = []
+        for proc, deadline in self._draining:
+            if proc.poll() is not None:
+                self._slots.pop(proc, None)
+                continue
+            if time.monotonic() >= deadline:
+                logger.warning(f"Consumer pid={proc.pid} did not drain in time; killing")
+                proc.kill()
+                proc.wait()
+                self._slots.pop(proc, None)
+                continue
+            still_draining.append((proc, deadline))
+        self._draining = still_draining
+
+    def scale_to(self, n: int) -> None:
+        """Start or retire processes until n are running (or no slot is free)."""
+        while len(self._procs) < n:
+            if not self._spawn():
+                break
+        while len(self._procs) > n:
+            self._retire()
+
+    def step(self) -> None:
+        """One poll: reap, measure and scale."""
+        self._reap()
+        try:
+            depth = self.monitor.depth()
+        except Exception as e:
+            # Broker unreachable: keep what is running (at least the minimum)
+            logger.warning(f"Cannot read queue depth: {e}")
+            self.scale_to(max(len(self._procs), self.policy.min_procs))
+            return
+
+        utilisation = self.monitor.utilisation()
+        current = len(self._procs)
+        target = self.policy.desired(current, depth, utilisation)
+        if target != current:
+            logger.info(
+                f"Scaling consumers {current} -> {target} "
+                f"(depth={depth}, utilisation={utilisation})"
+            )
+        self.scale_to(target)
+
+    def stop(self, *_args) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        """Supervise until SIGTERM/SIGINT, then drain every process."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.scale_to(self.policy.min_procs)
+
+        while not self._stopping:
+            self.step()
+            deadline = time.monotonic() + self.poll_interval
+            while not self._stopping and time.monotonic() < deadline:
+                time.sleep(0.2)
+
+        logger.info("Stopping: draining all consumers")
+        self.scale_to(0)
+        while self._draining:
+            self._reap()
+            time.sleep(0.2)
+        self.monitor.close()
+
+
+def consumer_command(script: str) -> list[str]:
+    """argv that runs a consumer script with the current interpreter."""
+    return [sys.executable, script]
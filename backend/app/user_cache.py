@@ -0,0 +1,262 @@
+"""Read-through cache for User entities.
+
+Entries are kept as plain column dictionaries in a per-process LRU with TTL
+(optionally backed by Redis) and turned back into session-attached ``User``
+objects without issuing SQL. Changed users are announced on
+USER_INVALIDATION_CHANNEL so every worker drops its local copy; the
+password hash never leaves the process and is loaded from the database
+when a user read from Redis needs it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.models import User, db
+from app.redis_client import (
+    cache_delete_keys,
+    cache_get,
+    cache_set,
+    publish,
+    start_listener,
+    subscribe,
+)
+
+# Pub/sub channel announcing changed user IDs
+USER_INVALIDATION_CHANNEL = "user:invalidate"
+
+_COLUMNS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "password_hash",
+    "account_balance",
+    "created_at",
+    "updated_at",
+)
+
+# Columns written to the shared Redis tier
+_SHARED_COLUMNS = tuple(name for name in _COLUMNS if name != "password_hash")
+
+
+class UserCache:
+    """Thread-safe LRU cache of user rows keyed by ID, with an email index.
+
+    Subscribed to USER_INVALIDATION_CHANNEL through the Redis pub/sub
+    listener. The in-process tier is only used while that subscription is
+    up (so no worker serves a user another worker changed) and is cleared
+    whenever it is re-established.
+
+    Attributes:
+        max_size: Maximum number of users kept in memory
+        ttl: Seconds an entry stays valid
+        use_redis: Whether to read through / write to the Redis cache too
+    """
+
+    channel = USER_INVALIDATION_CHANNEL
+
+    def __init__(self, max_size: int = 1024, ttl: int = 60, use_redis: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.enabled = True
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self._email_index: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._coherent = threading.Event()
+
+    @property
+    def local_active(self) -> bool:
+        """Whether the in-process tier may be read and written."""
+        return self.enabled and self._coherent.is_set()
+
+    # -- in-process tier ---------------------------------------------------
+
+    def _get_local(self, user_id: int) -> Optional[dict]:
+        if not self.local_active:
+            return None
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is None:
+                return None
+            expires_at, data = item
+            if expires_at < time.monotonic():
+                self._drop_local(user_id)
+                return None
+            self._entries.move_to_end(user_id)
+            return data
+
+    def _put_local(self, data: dict) -> None:
+        if not self.local_active:
+            return
+        with self._lock:
+            user_id = data["id"]
+            self._drop_local(user_id)
+            self._entries[user_id] = (time.monotonic() + self.ttl, data)
+            self._email_index[data["email"]] = user_id
+            while len(self._entries) > self.max_size:
+                oldest_id, _ = next(iter(self._entries.items()))
+                self._drop_local(oldest_id)
+
+    def _drop_local(self, user_id: int) -> None:
+        """Remove an entry and its email index (caller holds the lock)."""
+        item = self._entries.pop(user_id, None)
+        if item is not None:
+            email = item[1]["email"]
+            if self._email_index.get(email) == user_id:
+                del self._email_index[email]
+
+    # -- public API --------------------------------------------------------
+
+    def get_by_id(self, user_id: int) -> Optional[User]:
+        """Return a cached user attached to the current session, or None."""
+        if not self.enabled:
+            return None
+
+        start_listener()
+        data = self._get_local(user_id)
+        if data is None and self.use_redis:
+            data = _decode(cache_get(f"user_entity:{user_id}"))
+            if data is not None:
+                self._put_local(data)
+
+        return _to_entity(data) if data is not None else None
+
+    def get_id_by_email(self, email: str) -> Optional[int]:
+        """Resolve an email to a cached user ID, or None."""
+        if not self.enabled:
+            return None
+
+        user_id = None
+        if self.local_active:
+            with self._lock:
+                user_id = self._email_index.get(email)
+        if user_id is None and self.use_redis:
+            user_id = cache_get(f"user_email:{email}")
+        return user_id
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        """Return a cached user for the email, or None."""
+        user_id = self.get_id_by_email(email)
+        if user_id is None:
+            return None
+
+        user = self.get_by_id(user_id)
+        # Guard against a stale email -> id mapping
+        if user is None or user.email != email:
+            return None
+        return user
+
+    def put(self, user: User) -> None:
+        """Store a user's current column values in the cache.
+
+        Call invalidate() first when the user was changed, so other
+        workers drop their copies.
+        """
+        if not self.enabled:
+            return
+
+        data = {name: getattr(user, name) for name in _COLUMNS}
+        self._put_local(data)
+        if self.use_redis:
+            shared = {name: data[name] for name in _SHARED_COLUMNS}
+            cache_set(f"user_entity:{data['id']}", _encode(shared), ttl=self.ttl)
+            cache_set(f"user_email:{data['email']}", data["id"], ttl=self.ttl)
+
+    def invalidate(self, user_id: int, *emails: str) -> None:
+        """Drop a user (and any given emails) from every cache tier.
+
+        Other workers are told to drop the user through pub/sub.
+        """
+        with self._lock:
+            self._drop_local(user_id)
+            for email in emails:
+                if self._email_index.get(email) == user_id:
+                    del self._email_index[email]
+
+        if self.use_redis:
+            cache_delete_keys(
+                f"user_entity:{user_id}",
+                *(f"user_email:{email}" for email in emails),
+            )
+        if self.enabled:
+            publish(self.channel, str(user_id))
+
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        with self._lock:
+            self._entries.clear()
+            self._email_index.clear()
+
+    def on_sync(self, r) -> None:
+        """Start from an empty local tier once invalidations are received."""
+        self.clear()
+        self._coherent.set()
+
+    def on_message(self, data: str) -> None:
+        """Drop a user announced as changed by another worker."""
+        with self._lock:
+            self._drop_local(int(data))
+
+    def on_desync(self) -> None:
+        """Bypass the local tier until invalidations are received again."""
+        self._coherent.clear()
+        self.clear()
+
+
+def _to_entity(data: dict) -> User:
+    """Rebuild a persistent User from cached columns without querying.
+
+    Columns missing from the entry (password_hash from Redis) are loaded
+    on first access.
+    """
+    user = User(**data)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def _encode(data: dict) -> dict:
+    """Convert cached columns into JSON-serializable values."""
+    return {
+        **data,
+        "account_balance": str(data["account_balance"]),
+        "created_at": data["created_at"].isoformat(),
+        "updated_at": data["updated_at"].isoformat(),
+    }
+
+
+def _decode(payload: Optional[dict]) -> Optional[dict]:
+    """Inverse of :func:`_encode`."""
+    if payload is None:
+        return None
+    return {
+        **payload,
+        "account_balance": Decimal(payload["account_balance"]),
+        "created_at": datetime.fromisoformat(payload["created_at"]),
+        "updated_at": datetime.fromisoformat(payload["updated_at"]),
+    }
+
+
+# Global cache instance, configured by init_user_cache()
+user_cache = UserCache()
+subscribe(user_cache)
+
+
+def init_user_cache(app: Flask) -> None:
+    """Configure the User entity cache from Flask app config.
+
+    Args:
+        app: Flask application instance
+    """
+    user_cache.enabled = app.config.get("USER_CACHE_ENABLED", True)
+    user_cache.max_size = app.config.get("USER_CACHE_SIZE", 1024)
+    user_cache.ttl = app.config.get("USER_CACHE_TTL", 60)
+    user_cache.use_redis = app.config.get("USER_CACHE_REDIS", False)
+    user_cache.clear()
@@ -0,0 +1,298 @@
+"""Bulk user import from CSV or NDJSON streams.
+
+Rows are validated with RegisterSchema and processed in batches: the
+batch's passwords are hashed in parallel in the password worker pool,
+then its users are written with one multi-row INSERT that skips emails
+already taken (``ON CONFLICT (email) DO NOTHING ... RETURNING``), so the
+unique index resolves duplicates instead of a SELECT per row. Users
+created in a batch get their registration emails through the outbox in
+the same transaction. Every input row gets a result: created, duplicate,
+invalid or error.
+"""
+
+import csv
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from marshmallow import EXCLUDE, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models import OutboxMessage, User, db
+from app.passwords import password_hasher
+from app.schemas import RegisterSchema
+from app.services import registration_event
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+
+# Row outcomes
+CREATED = "created"
+DUPLICATE = "duplicate"
+INVALID = "invalid"
+ERROR = "error"
+
+# What errors="replace" decodes undecodable bytes to
+_UNDECODABLE = "\ufffd"
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING RETURNING
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    """Guess the import format from a file name or Content-Type."""
+    if content_type:
+        content_type = content_type.split(";", 1)[0].strip().lower()
+        if content_type in ("text/csv", "application/csv"):
+            return "csv"
+        if content_type in ("application/x-ndjson", "application/jsonl", "application/json-seq"):
+            return "ndjson"
+    if filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        if extension == "csv":
+            return "csv"
+        if extension in ("ndjson", "jsonl"):
+            return "ndjson"
+    return None
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, row, parse error) for each record in the stream.
+
+    CSV input needs a header row; empty cells are treated as missing.
+    Blank NDJSON lines are skipped. Open the stream with
+    ``errors="replace"``: records with undecodable bytes are then reported
+    as invalid one by one. With strict decoding, the first bad byte ends
+    the input with one invalid record.
+    """
+    line_no = 0
+    try:
+        for line_no, row, error in _read_records(stream, fmt):
+            yield line_no, row, error
+    except UnicodeDecodeError as e:
+        yield line_no + 1, None, f"invalid UTF-8, rest of the input skipped: {e}"
+
+
+def _read_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        try:
+            for row in reader:
+                if any(_UNDECODABLE in value for value in row.values() if isinstance(value, str)):
+                    yield reader.line_num, None, "invalid UTF-8"
+                    continue
+                yield reader.line_num, {
+                    key: value for key, value in row.items()
+                    if key is not None and value not in (None, "")
+                }, None
+        except csv.Error as e:
+            yield reader.line_num, None, f"invalid CSV: {e}"
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        if _UNDECODABLE in line:
+            yield line_no, None, "invalid UTF-8"
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, row, None
+
+
+class UserImporter:
+    """Imports users in batches and reports the outcome of every row.
+
+    Attributes:
+        batch_size: Rows hashed and inserted per transaction
+        send_emails: Queue registration emails for created users
+    """
+
+    def __init__(self, batch_size: int = 1000, send_emails: bool = True):
+        self.batch_size = max(batch_size, 1)
+        self.send_emails = send_emails
+        self.summary: dict[str, Any] = {}
+        self._schema = RegisterSchema(unknown=EXCLUDE)
+        # Emails inserted (or found to exist) by earlier batches of this import
+        self._seen: set[str] = set()
+
+    def iter_results(self, stream: TextIO, fmt: str) -> Iterator[dict]:
+        """Import every row of a CSV or NDJSON stream, yielding row results.
+
+        Results come in input order as each batch is committed, so callers
+        can report progress while later batches are hashed. ``summary`` is
+        complete once the iterator is exhausted.
+
+        Args:
+            stream: Text stream to read
+            fmt: 'csv' or 'ndjson'
+
+        Yields:
+            Result of each row
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+        started = time.perf_counter()
+        summary = self.summary = {"total": 0, CREATED: 0, DUPLICATE: 0, INVALID: 0, ERROR: 0}
+        batch = []
+
+        def flush():
+            results = self.import_batch(batch)
+            batch.clear()
+            for result in results:
+                summary["total"] += 1
+                summary[result["status"]] += 1
+            return results
+
+        for record in read_rows(stream, fmt):
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield from flush()
+        yield from flush()
+
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"User import finished: {summary}")
+
+    def run(
+        self,
+        stream: TextIO,
+        fmt: str,
+        on_result: Optional[Callable[[dict], None]] = None,
+    ) -> dict[str, Any]:
+        """Import every row of a CSV or NDJSON stream.
+
+        Args:
+            stream: Text stream to read
+            fmt: 'csv' or 'ndjson'
+            on_result: Called with each row's result, in input order
+
+        Returns:
+            Summary with the count of each outcome, total rows and seconds
+        """
+        for result in self.iter_results(stream, fmt):
+            if on_result is not None:
+                on_result(result)
+        return self.summary
+
+    def import_batch(
+        self, records: list[tuple[int, Optional[dict], Optional[str]]]
+    ) -> list[dict]:
+        """Validate, hash and insert one batch.
+
+        Returns:
+            One result per record, in input order
+        """
+        results: list[dict] = []
+        valid: list[tuple[dict, dict]] = []
+        batch_emails: set[str] = set()
+
+        for line_no, row, parse_error in records:
+            result = {"line": line_no}
+            results.append(result)
+            if parse_error:
+                result.update(status=INVALID, errors={"_row": [parse_error]})
+                continue
+            if isinstance(row.get("email"), str):
+                result["email"] = row["email"]
+            try:
+                data = self._schema.load(row)
+            except ValidationError as err:
+                result.update(status=INVALID, errors=err.messages)
+                continue
+            if data["email"] in self._seen or data["email"] in batch_emails:
+                result.update(status=DUPLICATE, error="Duplicate email in import")
+                continue
+            batch_emails.add(data["email"])
+            valid.append((result, data))
+
+        if valid:
+            try:
+                created = self._insert([data for _, data in valid])
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("User import batch failed")
+                for result, _ in valid:
+                    result.update(status=ERROR, error=f"An error occurred: {e}")
+            else:
+                # Only now: rows repeating an email of a failed batch are retried
+                self._seen.update(batch_emails)
+                for result, data in valid:
+                    user_id = created.get(data["email"])
+                    if user_id is None:
+                        result.update(status=DUPLICATE, error="User with this email already exists")
+                    else:
+                        result.update(status=CREATED, id=user_id)
+        return results
+
+    def _insert(self, rows: list[dict]) -> dict[str, int]:
+        """Insert users that do not exist yet; return {email: id} of created ones."""
+        # Skip hashing users that already exist (e.g. a re-run import); the
+        # unique index still settles emails registered concurrently
+        emails = [row["email"] for row in rows]
+        existing = set(db.session.scalars(select(User.email).where(User.email.in_(emails))))
+        rows = [row for row in rows if row["email"] not in existing]
+        if not rows:
+            db.session.rollback()
+            return {}
+
+        now = datetime.now(timezone.utc)
+        password_hashes = password_hasher.hash_many([row["password"] for row in rows])
+        values = [
+            {
+                "first_name": row["first_name"],
+                "last_name": row["last_name"],
+                "email": row["email"],
+                "password_hash": password_hash,
+                "account_balance": Decimal(str(row.get("account_balance", "0.00"))),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for row, password_hash in zip(rows, password_hashes)
+        ]
+
+        connection = db.session.connection()
+        dialect_insert = _UPSERT_DIALECTS.get(db.engine.dialect.name)
+        if dialect_insert is not None:
+            # executemany: SQLAlchemy sends it as multi-row INSERTs
+            # ("insertmanyvalues") and the compiled statement is cached
+            stmt = (
+                dialect_insert(User)
+                .on_conflict_do_nothing(index_elements=["email"])
+                .returning(User.id, User.email)
+            )
+            created = {email: user_id for user_id, email in connection.execute(stmt, values)}
+        else:
+            # No ON CONFLICT: a concurrent insert fails the whole batch
+            connection.execute(insert(User), values)
+            created = dict(connection.execute(
+                select(User.email, User.id).where(
+                    User.email.in_([value["email"] for value in values])
+                )
+            ).all())
+
+        if self.send_emails and created:
+            connection.execute(insert(OutboxMessage), [
+                {
+                    "queue": "email-send",
+                    "payload": registration_event(
+                        value["email"], value["first_name"], value["last_name"]
+                    ),
+                    "created_at": now,
+                }
+                for value in values
+                if value["email"] in created
+            ])
+        db.session.commit()
+        return created
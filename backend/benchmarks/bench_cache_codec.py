@@ -0,0 +1,99 @@
+"""Microbenchmark cache codecs: encode/decode time and bytes per entry.
+
+Covers the payloads the app caches (profile, balance, User entity) plus a
+large one that crosses the compression threshold. With --redis, entries are
+also written to Redis (REDIS_URL or localhost:6379) and MEMORY USAGE is
+reported per entry.
+
+Usage:
+    poetry run python benchmarks/bench_cache_codec.py
+    poetry run python benchmarks/bench_cache_codec.py --redis
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.cache_codecs import decode, encode, get_codec  # noqa: E402
+
+USER = {
+    "id": 12345,
+    "first_name": "Jan",
+    "last_name": "Kowalski",
+    "email": "jan.kowalski@example.com",
+    "created_at": "2026-01-28T10:00:00.000000",
+    "updated_at": "2026-01-28T10:15:00.000000",
+}
+
+PAYLOADS = {
+    "profile": {"value": {"user": USER}, "expires_at": 1769594400.0, "delta": 0.002},
+    "balance": {
+        "value": {"account_balance": "1000.00", "currency": "PLN"},
+        "expires_at": 1769594400.0,
+        "delta": 0.001,
+    },
+    "entity": {
+        **USER,
+        "password_hash": "scrypt:32768:8:1$" + "a" * 16 + "$" + "f" * 128,
+        "account_balance": "1000.00",
+    },
+    "large": {"users": [USER] * 50},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--threshold", type=int, default=1024)
+    parser.add_argument("--redis", action="store_true")
+    args = parser.parse_args()
+
+    variants = [
+        (name, threshold)
+        for name in ("json", "msgpack")
+        if get_codec(name) is not None
+        for threshold in (0, args.threshold)
+    ]
+
+    r = None
+    if args.redis:
+        import redis
+
+        r = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+
+    header = (
+        f"{'payload':>8} {'codec':>8} {'zlib>=':>6} {'bytes':>6} "
+        f"{'enc us':>7} {'dec us':>7}"
+    )
+    print(header + (f" {'redis B':>8}" if r else ""))
+
+    for payload_name, payload in PAYLOADS.items():
+        for codec_name, threshold in variants:
+            codec = get_codec(codec_name)
+            data = encode(payload, codec, threshold)
+            assert decode(data) == payload
+
+            enc = timeit.timeit(
+                lambda: encode(payload, codec, threshold), number=args.number
+            )
+            dec = timeit.timeit(lambda: decode(data), number=args.number)
+            line = (
+                f"{payload_name:>8} {codec_name:>8} {threshold or '-':>6} "
+                f"{len(data):>6} {enc / args.number * 1e6:>7.2f} "
+                f"{dec / args.number * 1e6:>7.2f}"
+            )
+
+            if r is not None:
+                key = f"bench:codec:{payload_name}:{codec_name}:{threshold}"
+                r.set(key, data)
+                line += f" {r.memory_usage(key):>8}"
+                r.delete(key)
+
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
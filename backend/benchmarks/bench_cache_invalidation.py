@@ -0,0 +1,96 @@
+"""Benchmark per-user cache invalidation: SCAN pattern delete vs tag sets.
+
+Requires a running Redis (REDIS_URL or localhost:6379) that can be filled
+with filler keys. The keyspace is populated with ``--keys`` unrelated
+entries, then one user's entries are invalidated with the previous
+``scan_iter`` approach and with cache_invalidate_tags().
+
+Usage:
+    poetry run python benchmarks/bench_cache_invalidation.py --keys 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.redis_client import INVALIDATE_TAG_SCRIPT  # noqa: E402
+
+PREFIX = "bench:inv"
+
+
+def populate(r: redis.Redis, keys: int) -> None:
+    """Fill the keyspace with filler entries."""
+    pipe = r.pipeline(transaction=False)
+    for i in range(keys):
+        pipe.set(f"{PREFIX}:filler:{i}", "x", ex=3600)
+        if i % 10000 == 9999:
+            pipe.execute()
+    pipe.execute()
+
+
+def cache_user(r: redis.Redis, user_id: int) -> None:
+    """Store a user's profile and balance with a tag set, like cache_set."""
+    pipe = r.pipeline(transaction=False)
+    for name in ("profile", "balance"):
+        key = f"{PREFIX}:cache:user:{user_id}:{name}"
+        pipe.setex(key, 300, "{}")
+        pipe.sadd(f"{PREFIX}:tag:user:{user_id}", key)
+    pipe.expire(f"{PREFIX}:tag:user:{user_id}", 300)
+    pipe.execute()
+
+
+def scan_delete(r: redis.Redis, user_id: int) -> int:
+    """Previous cache_delete('user:{id}:*')."""
+    keys = list(r.scan_iter(f"{PREFIX}:cache:user:{user_id}:*"))
+    return r.delete(*keys) if keys else 0
+
+
+def timed(fn, *args) -> tuple[float, int]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    r = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+    script = r.register_script(INVALIDATE_TAG_SCRIPT)
+
+    print(f"Populating {args.keys} filler keys...")
+    populate(r, args.keys)
+    print(f"dbsize={r.dbsize()}")
+
+    for user_id in range(args.rounds):
+        cache_user(r, user_id)
+        scan_ms, scan_deleted = timed(scan_delete, r, user_id)
+        cache_user(r, user_id)
+        tag_ms, tag_deleted = timed(
+            lambda: script(keys=[f"{PREFIX}:tag:user:{user_id}"])
+        )
+        print(
+            f"user {user_id}: scan {scan_ms:9.2f} ms ({scan_deleted} keys)   "
+            f"tags {tag_ms:7.3f} ms ({tag_deleted} keys)"
+        )
+
+    print("Cleaning up...")
+    batch = []
+    for key in r.scan_iter(f"{PREFIX}:*", count=10000):
+        batch.append(key)
+        if len(batch) >= 10000:
+            r.delete(*batch)
+            batch.clear()
+    if batch:
+        r.delete(*batch)
+
+
+if __name__ == "__main__":
+    main()
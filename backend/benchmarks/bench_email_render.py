@@ -0,0 +1,76 @@
+"""Benchmark email rendering: per-message MIMEMultipart vs compiled templates.
+
+Renders the registration email the way the consumer used to (f-strings
+plus a new MIMEMultipart serialized with as_string()) and with the
+precompiled TemplateRegistry, which also adds an HTML part.
+
+Usage:
+    poetry run python benchmarks/bench_email_render.py
+    poetry run python benchmarks/bench_email_render.py --number 50000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from email import message_from_string
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.email_templates import TemplateRegistry  # noqa: E402
+
+MESSAGE = {
+    "message_id": "6f1c1c1e-5d8c-4a43-9d8c-1f6a4f7b2c10",
+    "event": "user_registered",
+    "email": "jan.kowalski@example.com",
+    "first_name": "Jan",
+    "last_name": "Kowalski",
+    "registered_at": "2026-01-28T10:00:00+00:00",
+}
+
+
+def legacy_render(data: dict) -> str:
+    """Previous callback()/send_email() rendering."""
+    subject = f"CDV Webapp - {data.get('event', 'unknown')}"
+    body_text = (
+        f"Hello {data.get('first_name', '')} {data.get('last_name', '')},\n\n"
+        f"Event: {data.get('event', 'unknown')}\n"
+        f"Registered at: {data.get('registered_at', '')}\n\n"
+        f"Best regards,\nCDV Webapp Team"
+    )
+    msg = MIMEMultipart()
+    msg["From"] = "noreply@cdv-webapp.local"
+    msg["To"] = data["email"]
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body_text, "plain"))
+    return msg.as_string()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    registry = TemplateRegistry()
+    for locale in ("en", "pl"):
+        _, rendered = registry.render({**MESSAGE, "locale": locale})
+        parsed = message_from_string(rendered)
+        assert parsed.is_multipart() and len(parsed.get_payload()) == 2
+
+    print(f"{'renderer':>10} {'msg/s':>10} {'us/msg':>8}")
+    for name, render in (
+        ("legacy", lambda: legacy_render(MESSAGE)),
+        ("compiled", lambda: registry.render(MESSAGE)),
+        ("compiled pl", lambda: registry.render({**MESSAGE, "locale": "pl"})),
+    ):
+        elapsed = timeit.timeit(render, number=args.number)
+        print(
+            f"{name:>10} {args.number / elapsed:>10.0f} "
+            f"{elapsed / args.number * 1e6:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark password verification throughput (logins/sec per core).
+
+Runs check_password through the password worker pool from many request
+threads, the way /api/auth/login does, and reports throughput for each
+pool size.
+
+Usage:
+    poetry run python benchmarks/bench_password_hashing.py
+    poetry run python benchmarks/bench_password_hashing.py --method pbkdf2:sha256:600000
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.passwords import PasswordHasher  # noqa: E402
+
+
+def run(method: str, workers: int, logins: int, threads: int) -> float:
+    """Return logins/sec for the given pool size."""
+    hasher = PasswordHasher(method=method, workers=workers)
+    password_hash = hasher.hash("securepass123")
+    hasher.verify(password_hash, "securepass123")  # warm up the pool
+
+    def login(_):
+        return hasher.verify(password_hash, "securepass123")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    assert all(results)
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", default="scrypt")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"method={args.method} logins={args.logins} cores={cores}")
+    print(f"{'workers':>8} {'logins/s':>10} {'per core':>10}")
+
+    for workers in sorted({0, 1, max(cores // 2, 1), cores}):
+        rate = run(args.method, workers, args.logins, args.threads)
+        used = max(workers, 1)
+        print(f"{workers:>8} {rate:>10.1f} {rate / used:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
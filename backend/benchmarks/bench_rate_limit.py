@@ -0,0 +1,88 @@
+"""Benchmark the Lua rate limiter against the previous INCR/TTL decorator.
+
+Requires a running Redis (REDIS_URL or localhost:6379). Both limiters are
+called the way the decorator does for every /login request; the previous
+implementation is reproduced here for comparison.
+
+Usage:
+    poetry run python benchmarks/bench_rate_limit.py
+    poetry run python benchmarks/bench_rate_limit.py --requests 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.redis_client import RATE_LIMIT_SCRIPT  # noqa: E402
+
+
+def legacy_rate_limit(r: redis.Redis, key: str, max_requests: int, window: int) -> bool:
+    """INCR+TTL pipeline, separate EXPIRE and TTL on rejection (2-3 round trips)."""
+    pipe = r.pipeline()
+    pipe.incr(key)
+    pipe.ttl(key)
+    count, ttl = pipe.execute()
+    if ttl == -1:
+        r.expire(key, window)
+    if count > max_requests:
+        r.ttl(key)
+        return False
+    return True
+
+
+def lua_rate_limit(script, key: str, max_requests: int, window: int) -> bool:
+    """Single EVALSHA."""
+    allowed, _ = script(keys=[key], args=[max_requests, window * 1000])
+    return bool(allowed)
+
+
+def bench(name: str, fn, requests: int, clients: int) -> None:
+    start = time.perf_counter()
+    allowed = 0
+    for i in range(requests):
+        allowed += fn(f"bench:rl:{name}:{i % clients}")
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:>8}: {requests / elapsed:>10.0f} checks/s "
+        f"{elapsed / requests * 1e6:>8.1f} us/check  allowed={allowed}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+
+    r = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+    script = r.register_script(RATE_LIMIT_SCRIPT)
+
+    for key in r.scan_iter("bench:rl:*"):
+        r.delete(key)
+
+    bench(
+        "legacy",
+        lambda key: legacy_rate_limit(r, key, args.limit, args.window),
+        args.requests,
+        args.clients,
+    )
+    bench(
+        "lua",
+        lambda key: lua_rate_limit(script, key, args.limit, args.window),
+        args.requests,
+        args.clients,
+    )
+
+    for key in r.scan_iter("bench:rl:*"):
+        r.delete(key)
+
+
+if __name__ == "__main__":
+    main()
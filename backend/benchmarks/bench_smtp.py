@@ -0,0 +1,112 @@
+"""Benchmark email sending: connection per message vs persistent SmtpSession.
+
+Starts a local SMTP sink with aiosmtpd (``poetry run pip install
+aiosmtpd``) that accepts and discards messages, then sends the same
+registration email with a new smtplib connection per message, as the
+consumer used to, and through SmtpSession.
+
+Usage:
+    poetry run python benchmarks/bench_smtp.py
+    poetry run python benchmarks/bench_smtp.py --messages 2000 --host mailhog --port 1025
+"""
+
+import argparse
+import os
+import smtplib
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.mailer import SmtpSession  # noqa: E402
+
+SENDER = "noreply@cdv-webapp.local"
+RECIPIENT = "jan.kowalski@example.com"
+
+
+class Sink:
+    """aiosmtpd handler that accepts every message."""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def build_message() -> str:
+    msg = MIMEMultipart()
+    msg["From"] = SENDER
+    msg["To"] = RECIPIENT
+    msg["Subject"] = "CDV Webapp - user_registered"
+    msg.attach(MIMEText("Hello Jan Kowalski,\n\nEvent: user_registered\n", "plain"))
+    return msg.as_string()
+
+
+def send_per_connection(host: str, port: int, message: str, count: int) -> None:
+    """Previous send_email(): a new connection for every message."""
+    for _ in range(count):
+        with smtplib.SMTP(host, port) as server:
+            server.sendmail(SENDER, RECIPIENT, message)
+
+
+def send_session(
+    host: str, port: int, message: str, count: int, max_messages: int
+) -> None:
+    session = SmtpSession(host, port, max_messages=max_messages)
+    for _ in range(count):
+        session.sendmail(SENDER, RECIPIENT, message)
+    session.close()
+
+
+def bench(name: str, fn, count: int) -> None:
+    start = time.perf_counter()
+    fn(count)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:>22}: {count / elapsed:>8.1f} msg/s "
+        f"{elapsed / count * 1000:>7.2f} ms/msg"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--max-messages", type=int, default=100)
+    parser.add_argument("--host", help="Use an existing SMTP server instead")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    controller = sink = None
+    host = args.host
+    if host is None:
+        from aiosmtpd.controller import Controller
+
+        sink = Sink()
+        host = "127.0.0.1"
+        controller = Controller(sink, hostname=host, port=args.port)
+        controller.start()
+
+    message = build_message()
+    try:
+        bench(
+            "connection per message",
+            lambda n: send_per_connection(host, args.port, message, n),
+            args.messages,
+        )
+        bench(
+            f"session (recycle {args.max_messages})",
+            lambda n: send_session(host, args.port, message, n, args.max_messages),
+            args.messages,
+        )
+    finally:
+        if controller is not None:
+            controller.stop()
+            print(f"sink received {sink.received} messages")
+
+
+if __name__ == "__main__":
+    main()
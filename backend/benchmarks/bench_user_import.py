@@ -0,0 +1,81 @@
+"""Benchmark bulk user import: create_user() per row vs UserImporter.
+
+Creates users in an in-memory SQLite database one at a time through
+UserService.create_user (what N /api/auth/register calls do) and with
+the batched importer, then re-runs the import to measure the all-duplicate
+path. Hashing dominates with production cost parameters, so the default
+--method is cheap to show the rest of the pipeline; pass --method scrypt
+to see the real rate per core.
+
+Usage:
+    poetry run python benchmarks/bench_user_import.py
+    poetry run python benchmarks/bench_user_import.py --rows 50000 --workers 8
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["REDIS_HOST"] = "127.0.0.1"
+os.environ["REDIS_PORT"] = "1"  # nothing listens here: run without Redis
+
+from app import create_app  # noqa: E402
+from app.models import User, db  # noqa: E402
+from app.passwords import password_hasher  # noqa: E402
+from app.services import UserService  # noqa: E402
+from app.user_import import UserImporter  # noqa: E402
+
+
+def ndjson(rows: int, prefix: str) -> str:
+    return "".join(
+        json.dumps({
+            "first_name": "Jan",
+            "last_name": "Kowalski",
+            "email": f"{prefix}{i}@example.com",
+            "password": "securepass123",
+        }) + "\n"
+        for i in range(rows)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--method", default="pbkdf2:sha256:1000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    app = create_app()
+    password_hasher.configure(args.method, 16, args.workers)
+
+    print(f"method={args.method} workers={args.workers} rows={args.rows}")
+    print(f"{'path':>22} {'rows/s':>10}")
+    with app.app_context():
+        per_row = max(args.rows // 10, 1)
+        start = time.perf_counter()
+        for i in range(per_row):
+            UserService.create_user("Jan", "Kowalski", f"single{i}@example.com", "securepass123")
+        print(f"{'create_user per row':>22} {per_row / (time.perf_counter() - start):>10.0f}")
+
+        data = ndjson(args.rows, "bulk")
+        for name in ("import", "import (duplicates)"):
+            importer = UserImporter(batch_size=args.batch_size)
+            summary = importer.run(io.StringIO(data), "ndjson")
+            print(f"{name:>22} {summary['total'] / summary['seconds']:>10.0f}")
+
+        assert User.query.count() == per_row + args.rows
+        db.session.remove()
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
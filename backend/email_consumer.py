@@ -1,13 +1,150 @@
-"""Email consumer - listens to email-send queue and sends emails via SMTP."""
+"""Email consumer - listens to email-send queue and sends emails via SMTP.
 
+With EMAIL_CONSUMER_WORKERS > 1 (or EMAIL_CONSUMER_BATCH_SIZE > 1)
+messages are handed to a thread pool in batches and up to
+EMAIL_CONSUMER_PREFETCH of them are in flight at once. pika's
+BlockingConnection is not thread-safe, so workers never touch the
+channel: acks are scheduled back onto the connection thread with
+``add_callback_threadsafe``.
+
+Failed messages are not requeued in place. They are republished to a
+TTL delay queue for the next retry tier (EMAIL_RETRY_DELAYS), which
+dead-letters them back to email-send when the delay expires; after the
+last tier, or for malformed messages, they go to email-send.dlq. The
+channel is in confirm mode: a delivery is acked only after the broker has
+confirmed its republished copy, and nacked back to the queue otherwise.
+Replay the dead-letter queue with
+``flask --app "app:create_app()" email replay-dlq``.
+
+Messages carry a ``message_id``. Before sending, the consumer claims it
+in Redis with SET NX; a message whose ID is already marked as sent is a
+redelivery and is acked without sending it again.
+
+Prometheus metrics are served on EMAIL_CONSUMER_METRICS_PORT at /metrics.
+"""
+
+import functools
 import json
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Optional
 
 import pika
+import redis
+from jinja2 import TemplateError
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
 
 from app.config import Config
+from app.email_templates import InvalidMessageError, TemplateRegistry
+from app.mailer import SmtpSession
+from app.rabbitmq import EMAIL_QUEUE, declare_email_queues, retry_or_dead_letter
+from app.redis_client import RELEASE_LOCK_SCRIPT
+
+# Outcomes of handling a message
+ACK = "ack"
+REJECT = "reject"  # can never succeed: dead-letter immediately
+RETRY = "retry"  # transient failure: retry after the next tier's delay
+
+# Templates are compiled once, when the consumer starts
+templates = TemplateRegistry(
+    sender=Config.EMAIL_SENDER, default_locale=Config.EMAIL_DEFAULT_LOCALE
+)
+
+# Prometheus metrics, served by start_metrics_server() in main()
+metrics = CollectorRegistry()
+MESSAGES = Counter(
+    "email_messages",
+    "Email-send messages handled, by event and outcome (sent, rejected, failed)",
+    ("event", "outcome"),
+    registry=metrics,
+)
+DUPLICATES = Counter(
+    "email_duplicates_skipped",
+    "Redelivered messages acked without sending",
+    registry=metrics,
+)
+REROUTED = Counter(
+    "email_rerouted",
+    "Failed messages republished, by target retry or dead-letter queue",
+    ("queue",),
+    registry=metrics,
+)
+IN_FLIGHT = Gauge(
+    "email_messages_in_flight",
+    "Deliveries received but not yet settled",
+    registry=metrics,
+)
+SMTP_SECONDS = Histogram(
+    "email_smtp_send_seconds",
+    "Time to hand one email to the SMTP server",
+    registry=metrics,
+)
+TIME_IN_QUEUE = Histogram(
+    "email_time_in_queue_seconds",
+    "Time from the event (registered_at) until its email was sent",
+    ("event",),
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600, 4 * 3600),
+    registry=metrics,
+)
+
+
+def start_metrics_server(port: int) -> bool:
+    """Serve the metrics on port (0 disables it); False if it cannot bind."""
+    if not port:
+        return False
+    try:
+        start_http_server(port, registry=metrics)
+    except OSError as e:
+        print(f"[!] Metrics server disabled: cannot bind port {port}: {e}")
+        return False
+    return True
+
+
+def observe_time_in_queue(data: dict[str, Any], event: str):
+    """Record how long a sent message waited since its registered_at."""
+    try:
+        created = datetime.fromisoformat(data["registered_at"])
+    except (KeyError, TypeError, ValueError):
+        return
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    waited = (datetime.now(timezone.utc) - created).total_seconds()
+    TIME_IN_QUEUE.labels(event).observe(max(waited, 0.0))
+
+
+# One long-lived SMTP session per thread that sends mail
+_local = threading.local()
+_sessions: list[SmtpSession] = []
+_sessions_lock = threading.Lock()
+
+
+def get_smtp_session() -> SmtpSession:
+    """Return the calling thread's SMTP session, opening it on first use."""
+    session = getattr(_local, "smtp_session", None)
+    if session is None:
+        session = SmtpSession(
+            Config.SMTP_HOST,
+            Config.SMTP_PORT,
+            max_messages=Config.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            idle_timeout=Config.SMTP_IDLE_TIMEOUT,
+        )
+        _local.smtp_session = session
+        with _sessions_lock:
+            _sessions.append(session)
+    return session
+
+
+def close_smtp_sessions():
+    """Quit every thread's SMTP session."""
+    with _sessions_lock:
+        sessions, _sessions[:] = list(_sessions), []
+    for session in sessions:
+        session.close()
 
 
 def get_rabbitmq_connection():
@@ -22,65 +159,425 @@ def get_rabbitmq_connection():
     )
 
 
-def send_email(to_email: str, subject: str, body: str):
-    """Send email via SMTP to Mailhog."""
-    msg = MIMEMultipart()
-    msg["From"] = "noreply@cdv-webapp.local"
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
+def send_email(to_email: str, message: str):
+    """Send a rendered email via SMTP over the thread's persistent session."""
+    started = time.perf_counter()
+    get_smtp_session().sendmail(templates.sender, to_email, message)
+    SMTP_SECONDS.observe(time.perf_counter() - started)
 
-    with smtplib.SMTP(Config.SMTP_HOST, Config.SMTP_PORT) as server:
-        server.sendmail(msg["From"], to_email, msg.as_string())
 
+def handle_message(body: bytes) -> tuple[str, Optional[str]]:
+    """Send the email described by an email-send message.
 
-def callback(ch, method, properties, body):
-    """Process email-send message."""
+    Returns:
+        Tuple of (outcome, error): ACK when sent, REJECT for malformed
+        messages, RETRY on errors
+    """
+    event = "unknown"
     try:
         data = json.loads(body)
-        event = data.get("event", "unknown")
+        event = str(data.get("event", "unknown"))
         email = data.get("email")
-        first_name = data.get("first_name", "")
-        last_name = data.get("last_name", "")
-        registered_at = data.get("registered_at", "")
 
         if not email:
             print(f"[!] Missing email in message: {data}")
-            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-            return
-
-        subject = f"CDV Webapp - {event}"
-        body_text = (
-            f"Hello {first_name} {last_name},\n\n"
-            f"Event: {event}\n"
-            f"Registered at: {registered_at}\n\n"
-            f"Best regards,\nCDV Webapp Team"
-        )
+            MESSAGES.labels(event, "rejected").inc()
+            return REJECT, "missing email"
 
-        send_email(email, subject, body_text)
+        to_email, message = templates.render(data)
+        send_email(to_email, message)
         print(f"[x] Email sent to {email} for event: {event}")
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        MESSAGES.labels(event, "sent").inc()
+        observe_time_in_queue(data, event)
+        return ACK, None
 
     except json.JSONDecodeError as e:
         print(f"[!] Invalid JSON: {e}")
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        MESSAGES.labels(event, "rejected").inc()
+        return REJECT, f"invalid JSON: {e}"
+    except (TemplateError, InvalidMessageError) as e:
+        print(f"[!] Cannot render message: {e}")
+        MESSAGES.labels(event, "rejected").inc()
+        return REJECT, f"template error: {e}"
     except Exception as e:
         print(f"[!] Error processing message: {e}")
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        MESSAGES.labels(event, "failed").inc()
+        return RETRY, str(e)
+
+
+def reroute_failure(ch, properties, body: bytes, outcome: str, error: Optional[str]) -> bool:
+    """Send a failed message to its next retry tier or the dead-letter queue.
+
+    Must run on the connection thread, before the delivery is acked.
+
+    Returns:
+        True once the broker confirmed the republished message; False if it
+        refused it, in which case the delivery must be nacked, not acked
+    """
+    try:
+        target = retry_or_dead_letter(
+            ch,
+            properties,
+            body,
+            Config.EMAIL_RETRY_DELAYS,
+            error=error,
+            dead_letter=outcome == REJECT,
+        )
+    except (pika.exceptions.NackError, pika.exceptions.UnroutableError) as e:
+        print(f"[!] Could not reroute message, requeueing it: {e!r}")
+        return False
+    REROUTED.labels(target).inc()
+    print(f"[!] Message moved to {target}")
+    return True
+
+
+def callback(ch, method, properties, body):
+    """Process email-send message on the connection thread."""
+    IN_FLIGHT.inc()
+    try:
+        [(outcome, error)] = handle_batch([body])
+        if outcome != ACK and not reroute_failure(ch, properties, body, outcome, error):
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            return
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+    finally:
+        IN_FLIGHT.dec()
+
+
+class EmailDeduplicator:
+    """Claims message IDs in Redis so each email is sent at most once.
+
+    A claim is ``SET email:msg:{id} pending:<token> NX EX claim_ttl``.
+    After a successful send the key is overwritten with ``sent`` for
+    ``sent_ttl``; after a failed send the claim is released so the retry
+    can take it. A message whose key says ``sent`` is a duplicate; one
+    that is still ``pending`` is being sent by another worker (or one
+    that crashed mid-send) and is retried later. Claims and results for a
+    batch are sent in one pipeline each. If Redis is unavailable,
+    messages are sent without deduplication and Redis is retried after
+    ``retry_interval`` seconds.
+    """
+
+    CLAIMED = "claimed"
+    SENT = "sent"
+    PENDING = "pending"
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis],
+        sent_ttl: int = 7 * 24 * 3600,
+        claim_ttl: int = 300,
+        retry_interval: float = 30.0,
+    ):
+        self.client = client
+        self.sent_ttl = sent_ttl
+        self.claim_ttl = claim_ttl
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        self._release = client.register_script(RELEASE_LOCK_SCRIPT) if client else None
+
+    def _available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._down_until
+
+    def _failed(self, e: Exception):
+        print(f"[!] Redis unavailable, sending without deduplication: {e}")
+        self._down_until = time.monotonic() + self.retry_interval
+
+    def claim(self, message_ids: list[str]) -> dict[str, tuple[str, Optional[str]]]:
+        """Claim message IDs.
+
+        Returns:
+            Mapping of message ID to (state, token): CLAIMED with the claim
+            token, SENT or PENDING. IDs missing from the result could not be
+            checked and should be sent anyway.
+        """
+        if not message_ids or not self._available():
+            return {}
+
+        tokens = {message_id: f"pending:{uuid.uuid4().hex}" for message_id in message_ids}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for message_id, token in tokens.items():
+                pipe.set(f"email:msg:{message_id}", token, nx=True, ex=self.claim_ttl)
+                pipe.get(f"email:msg:{message_id}")
+            replies = pipe.execute()
+        except redis.RedisError as e:
+            self._failed(e)
+            return {}
+
+        states = {}
+        for (message_id, token), claimed, current in zip(
+            tokens.items(), replies[::2], replies[1::2]
+        ):
+            if claimed:
+                states[message_id] = (self.CLAIMED, token)
+            elif current == b"sent":
+                states[message_id] = (self.SENT, None)
+            else:
+                states[message_id] = (self.PENDING, None)
+        return states
+
+    def finish(self, sent: list[str], failed: list[tuple[str, str]]):
+        """Mark sent IDs and release the claims of failed sends."""
+        if not (sent or failed) or not self._available():
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for message_id in sent:
+                pipe.set(f"email:msg:{message_id}", "sent", ex=self.sent_ttl)
+            for message_id, token in failed:
+                self._release(keys=[f"email:msg:{message_id}"], args=[token], client=pipe)
+            pipe.execute()
+        except redis.RedisError as e:
+            self._failed(e)
+
+
+def create_deduplicator() -> EmailDeduplicator:
+    """Build the deduplicator from config (REDIS_URL or REDIS_HOST/PORT)."""
+    options = {
+        "socket_connect_timeout": Config.REDIS_CONNECT_TIMEOUT,
+        "socket_timeout": Config.REDIS_SOCKET_TIMEOUT,
+    }
+    if Config.REDIS_URL:
+        client = redis.Redis.from_url(Config.REDIS_URL, **options)
+    else:
+        client = redis.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            db=Config.REDIS_DB,
+            password=Config.REDIS_PASSWORD,
+            **options,
+        )
+    return EmailDeduplicator(
+        client,
+        sent_ttl=Config.EMAIL_DEDUP_TTL,
+        claim_ttl=Config.EMAIL_DEDUP_CLAIM_TTL,
+    )
+
+
+deduplicator = create_deduplicator()
+
+
+def message_id_of(body: bytes) -> Optional[str]:
+    """Return a message's idempotency ID, if it is valid JSON and has one."""
+    try:
+        message_id = json.loads(body).get("message_id")
+    except (ValueError, AttributeError):
+        return None
+    return str(message_id) if message_id else None
+
+
+def handle_batch(bodies: list[bytes]) -> list[tuple[str, Optional[str]]]:
+    """Handle a batch of messages over the worker's single SMTP session.
+
+    Duplicates (IDs already marked as sent) are acked without sending.
+    """
+    message_ids = [message_id_of(body) for body in bodies]
+    claims = deduplicator.claim([message_id for message_id in message_ids if message_id])
+
+    results = []
+    sent, failed = [], []
+    seen = set()
+    for body, message_id in zip(bodies, message_ids):
+        state, token = claims.get(message_id, (None, None))
+        if message_id in seen:
+            # Redelivered copy in the same batch; the first one is handled
+            state = EmailDeduplicator.SENT
+        elif message_id:
+            seen.add(message_id)
+
+        if state == EmailDeduplicator.SENT:
+            DUPLICATES.inc()
+            print(f"[=] Skipping duplicate message {message_id}")
+            results.append((ACK, None))
+            continue
+        if state == EmailDeduplicator.PENDING:
+            results.append((RETRY, f"message {message_id} is being sent by another worker"))
+            continue
+
+        outcome, error = handle_message(body)
+        results.append((outcome, error))
+        if state == EmailDeduplicator.CLAIMED:
+            if outcome == ACK:
+                sent.append(message_id)
+            else:
+                failed.append((message_id, token))
+
+    deduplicator.finish(sent, failed)
+    return results
+
+
+class Dispatcher:
+    """Hands deliveries to the worker pool in batches and settles them in order.
+
+    Deliveries are collected into batches of up to ``batch_size`` messages,
+    or whatever arrived within ``batch_wait`` seconds of the first one.
+    Failures are republished to a retry tier (or the dead-letter queue);
+    then one ``multiple=True`` ack covers the longest run of settled
+    deliveries at the head of the channel, so an ack never covers a
+    message another batch is still sending. All channel calls happen on
+    the connection thread.
+    """
+
+    def __init__(
+        self,
+        connection,
+        channel,
+        executor: ThreadPoolExecutor,
+        batch_size: int = 1,
+        batch_wait: float = 0.05,
+    ):
+        self.connection = connection
+        self.channel = channel
+        self.executor = executor
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self._batch: list[tuple[int, Any, bytes]] = []
+        self._timer = None
+        # Delivery tags not yet acked, in delivery order
+        self._outstanding: deque[int] = deque()
+        self._settled: set[int] = set()
+
+    def on_message(self, ch, method, properties, body):
+        """basic_consume callback (connection thread)."""
+        IN_FLIGHT.inc()
+        self._outstanding.append(method.delivery_tag)
+        self._batch.append((method.delivery_tag, properties, body))
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.connection.call_later(self.batch_wait, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self.flush()
+
+    def flush(self):
+        """Submit the collected batch to the worker pool (connection thread)."""
+        if self._timer is not None:
+            self.connection.remove_timeout(self._timer)
+            self._timer = None
+
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        future = self.executor.submit(handle_batch, [body for _, _, body in batch])
+        future.add_done_callback(functools.partial(self._on_done, batch))
+
+    def _on_done(self, batch: list[tuple[int, Any, bytes]], future):
+        """Worker thread: marshal the outcomes back to the connection thread."""
+        if future.exception():
+            results = [(RETRY, str(future.exception()))] * len(batch)
+        else:
+            results = future.result()
+        try:
+            self.connection.add_callback_threadsafe(
+                functools.partial(self.settle, batch, results)
+            )
+        except Exception as e:
+            # Connection closed; the broker redelivers the messages
+            print(f"[!] Could not settle deliveries {batch[0][0]}-{batch[-1][0]}: {e}")
+
+    def settle(
+        self,
+        batch: list[tuple[int, Any, bytes]],
+        results: list[tuple[str, Optional[str]]],
+    ):
+        """Reroute failures and ack the settled head of the channel (connection thread)."""
+        IN_FLIGHT.dec(len(batch))
+        if not self.channel.is_open:
+            # The broker redelivers unacked messages once the channel is gone
+            return
+
+        for (tag, properties, body), (outcome, error) in zip(batch, results):
+            if outcome != ACK and not reroute_failure(
+                self.channel, properties, body, outcome, error
+            ):
+                # Settled by the nack; the multiple ack below skips it
+                self.channel.basic_nack(delivery_tag=tag, requeue=True)
+            self._settled.add(tag)
+
+        last_settled = None
+        while self._outstanding and self._outstanding[0] in self._settled:
+            last_settled = self._outstanding.popleft()
+            self._settled.discard(last_settled)
+
+        if last_settled is not None:
+            self.channel.basic_ack(delivery_tag=last_settled, multiple=True)
 
 
 def main():
     """Start email consumer."""
+    workers = Config.EMAIL_CONSUMER_WORKERS
+    batch_size = Config.EMAIL_CONSUMER_BATCH_SIZE
+    sequential = workers <= 1 and batch_size <= 1
+    prefetch = 1 if sequential else (
+        Config.EMAIL_CONSUMER_PREFETCH or workers * batch_size * 2
+    )
+
     connection = get_rabbitmq_connection()
     channel = connection.channel()
 
-    channel.queue_declare(queue="email-send", durable=True)
-    channel.basic_qos(prefetch_count=1)
+    declare_email_queues(channel, Config.EMAIL_RETRY_DELAYS)
+    # Reroutes wait for the broker's confirm before the delivery is acked
+    channel.confirm_delivery()
+    channel.basic_qos(prefetch_count=prefetch)
+
+    executor = dispatcher = None
+    on_message = callback
+    if not sequential:
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="email-worker"
+        )
+        dispatcher = Dispatcher(
+            connection,
+            channel,
+            executor,
+            batch_size=batch_size,
+            batch_wait=Config.EMAIL_CONSUMER_BATCH_WAIT_MS / 1000,
+        )
+        on_message = dispatcher.on_message
 
-    print("[*] Email consumer started. Waiting for messages...")
+    if start_metrics_server(Config.EMAIL_CONSUMER_METRICS_PORT):
+        print(f"[*] Metrics on :{Config.EMAIL_CONSUMER_METRICS_PORT}/metrics")
 
-    channel.basic_consume(queue="email-send", on_message_callback=callback, auto_ack=False)
-    channel.start_consuming()
+    print(
+        f"[*] Email consumer started (workers={workers}, batch={batch_size}, "
+        f"prefetch={prefetch}). Waiting for messages..."
+    )
+
+    def on_sigterm(signum, frame):
+        # Graceful drain (docker stop, supervisor scale-down): stop taking new
+        # deliveries; in-flight ones finish below. Undispatched prefetched
+        # messages are nacked back to the queue by pika.
+        print("[*] SIGTERM received, draining...")
+        connection.add_callback_threadsafe(channel.stop_consuming)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+    channel.basic_consume(queue=EMAIL_QUEUE, on_message_callback=on_message, auto_ack=False)
+    try:
+        channel.start_consuming()
+    except KeyboardInterrupt:
+        channel.stop_consuming()
+    finally:
+        if executor is not None:
+            # Send the partial batch and let in-flight emails finish, then
+            # deliver their acks
+            dispatcher.flush()
+            executor.shutdown(wait=True)
+            if connection.is_open:
+                connection.process_data_events(time_limit=0)
+        close_smtp_sessions()
+        if connection.is_open:
+            connection.close()
+        print(
+            f"[*] Email consumer stopped "
+            f"({metrics.get_sample_value('email_duplicates_skipped_total'):.0f} "
+            f"duplicates skipped)."
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+"""Email supervisor - scales email_consumer.py processes with the queue backlog."""
+
+import logging
+import os
+
+import pika
+
+from app.config import Config
+from app.rabbitmq import EMAIL_QUEUE
+from app.supervisor import QueueMonitor, ScalingPolicy, Supervisor, consumer_command
+
+
+def main():
+    """Start email supervisor."""
+    logging.basicConfig(level=logging.INFO)
+
+    credentials = pika.PlainCredentials(Config.RABBITMQ_USER, Config.RABBITMQ_PASS)
+    params = pika.ConnectionParameters(
+        host=Config.RABBITMQ_HOST,
+        port=Config.RABBITMQ_PORT,
+        credentials=credentials,
+    )
+
+    policy = ScalingPolicy(
+        min_procs=Config.EMAIL_SUPERVISOR_MIN_PROCS,
+        max_procs=Config.EMAIL_SUPERVISOR_MAX_PROCS,
+        target_backlog=Config.EMAIL_SUPERVISOR_TARGET_BACKLOG,
+        scale_down_after=Config.EMAIL_SUPERVISOR_SCALE_DOWN_AFTER,
+        cooldown=Config.EMAIL_SUPERVISOR_COOLDOWN,
+    )
+    supervisor = Supervisor(
+        consumer_command(os.path.join(os.path.dirname(__file__), "email_consumer.py")),
+        policy,
+        QueueMonitor(params, EMAIL_QUEUE, Config.RABBITMQ_MANAGEMENT_URL),
+        poll_interval=Config.EMAIL_SUPERVISOR_POLL_INTERVAL,
+        drain_timeout=Config.EMAIL_SUPERVISOR_DRAIN_TIMEOUT,
+        metrics_port=Config.EMAIL_CONSUMER_METRICS_PORT,
+    )
+
+    print(
+        f"[*] Email supervisor started "
+        f"({policy.min_procs}-{policy.max_procs} consumers)."
+    )
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Outbox relay - publishes events from the outbox table to RabbitMQ."""
+
+import logging
+import signal
+
+from app import create_app
+from app.outbox import OutboxRelay
+
+
+def main():
+    """Start outbox relay."""
+    logging.basicConfig(level=logging.INFO)
+    app = create_app()
+
+    relay = OutboxRelay(
+        batch_size=app.config["OUTBOX_BATCH_SIZE"],
+        poll_interval=app.config["OUTBOX_POLL_INTERVAL"],
+    )
+
+    # docker stop / Ctrl+C: finish the batch in flight, then exit
+    signal.signal(signal.SIGTERM, relay.stop)
+    signal.signal(signal.SIGINT, relay.stop)
+
+    print("[*] Outbox relay started. Waiting for events...")
+
+    with app.app_context():
+        relay.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+#!/bin/bash
+# Run outbox relay
+# Usage: ./run_outbox_relay.sh
+
+cd "$(dirname "$0")"
+poetry run python outbox_relay.py
@@ -0,0 +1,79 @@
+"""Shared fixtures: the app on in-memory SQLite with fakeredis."""
+
+import os
+
+# Config reads the environment when app.config is imported
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["BLOCKLIST_MIRROR_ENABLED"] = "false"
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import app.redis_client as redis_client  # noqa: E402
+from app import create_app  # noqa: E402
+from app.models import db  # noqa: E402
+
+
+class FakeBreakerRedis(redis_client.BreakerRedis, fakeredis.FakeRedis):
+    """BreakerRedis (round-trip counting, circuit breaker) backed by fakeredis."""
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """In-memory Redis server used by every client the app creates."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis_client,
+        "_create_client",
+        lambda app, decode_responses: FakeBreakerRedis(
+            server=server, decode_responses=decode_responses
+        ),
+    )
+    return server
+
+
+@pytest.fixture
+def app(redis_server):
+    app = create_app("development")
+    app.config.update(TESTING=True, RATE_LIMIT_REGISTER=100, RATE_LIMIT_LOGIN=100)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def sql_statements(app):
+    """SQL statements sent to the database while the test runs."""
+    statements: list[str] = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization header of a freshly registered user."""
+    response = client.post("/api/auth/register", json={
+        "first_name": "Jan",
+        "last_name": "Kowalski",
+        "email": "jan.kowalski@example.com",
+        "password": "securepass123",
+        "account_balance": "1000.00",
+    })
+    assert response.status_code == 201
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
@@ -0,0 +1,76 @@
+"""Tests for the /api/auth endpoints."""
+
+import pytest
+
+import app.redis_client as redis_client
+import app.routes_auth as routes_auth
+from conftest import FakeBreakerRedis
+
+REGISTRATION = {
+    "first_name": "Jan",
+    "last_name": "Kowalski",
+    "email": "jan.kowalski@example.com",
+    "password": "securepass123",
+}
+
+
+@pytest.fixture
+def tokens(client):
+    response = client.post("/api/auth/register", json=REGISTRATION)
+    assert response.status_code == 201
+    return response.get_json()
+
+
+@pytest.fixture
+def refresh_headers(tokens):
+    return {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+
+def test_refresh_rotates_token(client, refresh_headers):
+    response = client.post("/api/auth/refresh", headers=refresh_headers)
+    assert response.status_code == 200
+
+    reused = client.post("/api/auth/refresh", headers=refresh_headers)
+    assert reused.status_code == 401
+    assert reused.get_json()["error"] == "Refresh token already used"
+
+    # Reuse revokes every token of the login
+    rotated = response.get_json()["access_token"]
+    me = client.get("/api/users/me", headers={"Authorization": f"Bearer {rotated}"})
+    assert me.status_code == 401
+
+
+def test_unknown_refresh_token_does_not_revoke_login(client, redis_server, tokens, refresh_headers):
+    # Redis lost the rotation state, e.g. after a restart without persistence
+    FakeBreakerRedis(server=redis_server).flushall()
+
+    response = client.post("/api/auth/refresh", headers=refresh_headers)
+
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Refresh token not recognized, please log in again"
+    me = client.get(
+        "/api/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+    assert me.status_code == 200
+
+
+def test_login_without_refresh_store_omits_refresh_token(client, tokens, monkeypatch):
+    monkeypatch.setattr(routes_auth, "store_refresh_token", lambda *args: False)
+
+    response = client.post("/api/auth/login", json={
+        "email": REGISTRATION["email"],
+        "password": REGISTRATION["password"],
+    })
+
+    assert response.status_code == 200
+    assert "access_token" in response.get_json()
+    assert "refresh_token" not in response.get_json()
+
+
+def test_refresh_fails_closed_without_redis(client, refresh_headers, monkeypatch):
+    monkeypatch.setattr(redis_client, "get_redis", lambda: None)
+
+    response = client.post("/api/auth/refresh", headers=refresh_headers)
+
+    assert response.status_code == 401
+    assert "access_token" not in response.get_json()
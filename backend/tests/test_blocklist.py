@@ -0,0 +1,56 @@
+"""Tests for the JWT blocklist and its per-worker mirror."""
+
+import time
+
+import pytest
+
+import app.redis_client as redis_client
+from app.redis_client import (
+    BLOCKLIST_INDEX,
+    BlocklistMirror,
+    blacklist_token,
+    reindex_blocklist,
+)
+from conftest import FakeBreakerRedis
+
+
+@pytest.fixture
+def r(redis_server):
+    return FakeBreakerRedis(server=redis_server, decode_responses=True)
+
+
+def test_mirror_bootstraps_from_index_without_scan(app, r, monkeypatch):
+    with app.app_context():
+        blacklist_token("revoked", 60)
+    r.zadd(BLOCKLIST_INDEX, {"expired": time.time() - 1})
+    r.set("cache:unrelated", "{}")
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("bootstrap must not scan the keyspace")
+
+    monkeypatch.setattr(r, "scan_iter", no_scan)
+    mirror = BlocklistMirror()
+    mirror.on_sync(r)
+
+    assert mirror.synced
+    assert mirror.contains("revoked")
+    assert not mirror.contains("expired")
+    assert r.zrange(BLOCKLIST_INDEX, 0, -1) == ["revoked"]
+
+
+def test_reindex_adds_entries_written_before_the_index(app, r):
+    r.set("bl:old", "1", ex=60)
+    r.set("cache:unrelated", "{}")
+
+    with app.app_context():
+        assert reindex_blocklist() == 1
+
+    mirror = BlocklistMirror()
+    mirror.on_sync(r)
+    assert mirror.contains("old")
+
+
+def test_reindex_without_redis(app, monkeypatch):
+    monkeypatch.setattr(redis_client, "get_redis", lambda: None)
+
+    assert reindex_blocklist() is None
@@ -0,0 +1,131 @@
+"""Tests for the Redis cache helpers."""
+
+import threading
+import time
+
+import pytest
+
+import app.redis_client as redis_client
+from app.cache_codecs import decode, encode, get_codec
+from app.redis_client import (
+    CACHE_INVALIDATION_CHANNEL,
+    cache_get,
+    cache_get_or_compute,
+    cache_invalidate_tags,
+    cache_set,
+)
+from conftest import FakeBreakerRedis
+
+
+def test_get_or_compute_caches_value(app):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"answer": 42}
+
+    with app.test_request_context():
+        assert cache_get_or_compute("answer", compute) == {"answer": 42}
+    with app.test_request_context():
+        assert cache_get_or_compute("answer", compute) == {"answer": 42}
+
+    assert len(calls) == 1
+
+
+def test_get_or_compute_treats_old_entry_shape_as_miss(app):
+    with app.test_request_context():
+        cache_set("profile", {"body": "{}", "etag": "abc"})
+
+    with app.test_request_context():
+        assert cache_get_or_compute("profile", lambda: "fresh") == "fresh"
+    with app.test_request_context():
+        assert cache_get("profile")["value"] == "fresh"
+
+
+def test_get_or_compute_waits_for_lock_holder(app, redis_server):
+    # Another worker holds the single-flight lock and stores the value shortly
+    other = FakeBreakerRedis(server=redis_server)
+    other.set("lock:cache:report", "other-worker", px=5000)
+
+    def store_value():
+        time.sleep(0.1)
+        entry = {"value": "from lock holder", "expires_at": time.time() + 60, "delta": 0.1}
+        other.set("cache:report", encode(entry, get_codec("json")))
+
+    holder = threading.Thread(target=store_value)
+    holder.start()
+    try:
+        with app.test_request_context():
+            value = cache_get_or_compute(
+                "report", lambda: "computed by waiter", wait_timeout=2.0
+            )
+    finally:
+        holder.join()
+
+    assert value == "from lock holder"
+
+
+def test_default_cache_entries_stay_plain_json(app, redis_server):
+    with app.app_context():
+        cache_set("report", {"rows": ["x" * 100] * 100})
+
+    raw = FakeBreakerRedis(server=redis_server).get("cache:report")
+    # Workers from before the pluggable codecs read entries as UTF-8 text
+    assert raw.decode().startswith("{")
+
+
+@pytest.mark.parametrize("name", ["json", "msgpack"])
+def test_codecs_round_trip_compressed(name):
+    value = {"rows": ["x" * 100] * 100}
+
+    data = encode(value, get_codec(name), compress_threshold=1024)
+
+    assert len(data) < 1024
+    assert decode(data) == value
+
+
+def test_invalidate_tags_deletes_tagged_keys(app, redis_server):
+    with app.app_context():
+        cache_set("user:1:profile", {"id": 1}, tags=["user:1"])
+        cache_set("user:1:balance", {"balance": "10.00"}, tags=["user:1"])
+        cache_set("user:2:profile", {"id": 2}, tags=["user:2"])
+
+        assert cache_invalidate_tags("user:1") == 2
+
+        assert cache_get("user:1:profile") is None
+        assert cache_get("user:1:balance") is None
+        assert cache_get("user:2:profile") == {"id": 2}
+    r = FakeBreakerRedis(server=redis_server)
+    assert not r.exists("tag:user:1")
+    assert r.exists("tag:user:2")
+
+
+@pytest.fixture
+def l1(monkeypatch):
+    """L1 cache in sync without the listener thread."""
+    local_cache = redis_client._local_cache
+    monkeypatch.setattr(redis_client._listener, "start", lambda: None)
+    monkeypatch.setattr(local_cache, "enabled", True)
+    local_cache.on_sync(None)
+    yield local_cache
+    local_cache.on_desync()
+
+
+def test_invalidation_message_drops_l1_entry(app, redis_server, l1):
+    pubsub = FakeBreakerRedis(server=redis_server, decode_responses=True).pubsub(
+        ignore_subscribe_messages=True
+    )
+    pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+
+    with app.app_context():
+        cache_set("report", {"version": 2})
+        messages = [pubsub.get_message(timeout=0.1) for _ in range(3)]
+        announced = [m["data"] for m in messages if m]
+        assert announced == ["cache:report"]
+
+        # This worker still holds the previous value in its L1
+        l1.set("report", {"version": 1})
+        assert cache_get("report") == {"version": 1}
+
+        l1.on_message(announced[0])
+        assert cache_get("report") == {"version": 2}
@@ -0,0 +1,79 @@
+"""Tests for the email consumer's retry routing."""
+
+from types import SimpleNamespace
+
+import pika
+import pytest
+
+import email_consumer
+from app.rabbitmq import EMAIL_DEAD_LETTER_QUEUE, retry_queue_name
+
+
+class FakeChannel:
+    """Records publishes and acks; refuses publishes when ``nack`` is set."""
+
+    def __init__(self, nack: bool = False):
+        self.nack = nack
+        self.published: list[str] = []
+        self.acked: list[int] = []
+        self.nacked: list[int] = []
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+        if self.nack:
+            raise pika.exceptions.NackError([])
+        self.published.append(routing_key)
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acked.append(delivery_tag)
+
+    def basic_nack(self, delivery_tag, requeue=True):
+        self.nacked.append(delivery_tag)
+
+
+@pytest.fixture
+def failing_send(monkeypatch):
+    monkeypatch.setattr(
+        email_consumer, "handle_batch", lambda bodies: [(email_consumer.RETRY, "SMTP down")]
+    )
+
+
+def deliver(channel):
+    email_consumer.callback(
+        channel,
+        SimpleNamespace(delivery_tag=7),
+        pika.BasicProperties(content_type="application/json", headers={}),
+        b"{}",
+    )
+
+
+def test_failed_send_is_rerouted_then_acked(failing_send):
+    channel = FakeChannel()
+
+    deliver(channel)
+
+    assert channel.published == [retry_queue_name(email_consumer.Config.EMAIL_RETRY_DELAYS[0])]
+    assert channel.acked == [7]
+
+
+def test_refused_reroute_is_nacked_not_acked(failing_send):
+    channel = FakeChannel(nack=True)
+
+    deliver(channel)
+
+    assert channel.acked == []
+    assert channel.nacked == [7]
+
+
+def test_last_retry_goes_to_dead_letter_queue(failing_send):
+    channel = FakeChannel()
+    attempts = len(email_consumer.Config.EMAIL_RETRY_DELAYS)
+
+    email_consumer.callback(
+        channel,
+        SimpleNamespace(delivery_tag=8),
+        pika.BasicProperties(headers={"x-retry-count": attempts}),
+        b"{}",
+    )
+
+    assert channel.published == [EMAIL_DEAD_LETTER_QUEUE]
+    assert channel.acked == [8]
@@ -0,0 +1,60 @@
+"""Tests for email rendering."""
+
+from email import message_from_string
+
+import pytest
+
+from app.email_templates import InvalidMessageError, TemplateRegistry
+
+registry = TemplateRegistry()
+
+
+def render(**data):
+    message = {
+        "event": "user_registered",
+        "email": "jan@example.com",
+        "first_name": "Jan",
+        "last_name": "Kowalski",
+        **data,
+    }
+    return message_from_string(registry.render(message)[1])
+
+
+def test_render_registration_email():
+    email = render(message_id="abc")
+
+    assert email["To"] == "jan@example.com"
+    assert email["Subject"] == "Welcome to CDV Webapp, Jan!"
+    assert email["Message-ID"] == "<abc@cdv-webapp.local>"
+
+
+@pytest.mark.parametrize("first_name", [
+    "Jan\r\nBcc: victim@example.com",
+    "Jan\nBcc: victim@example.com",
+    "Żaneta\r\nBcc: victim@example.com",
+])
+def test_subject_cannot_inject_headers(first_name):
+    email = render(first_name=first_name)
+
+    assert email["Bcc"] is None
+    assert set(email.keys()) == {
+        "From", "MIME-Version", "Content-Type", "To", "Subject", "Date",
+    }
+
+
+@pytest.mark.parametrize("field", ["email", "message_id"])
+def test_line_break_in_recipient_or_id_is_rejected(field):
+    with pytest.raises(InvalidMessageError):
+        render(**{field: "jan@example.com\r\nBcc: victim@example.com"})
+
+
+def test_folded_subject_uses_crlf():
+    raw = registry.render({
+        "event": "user_registered",
+        "email": "jan@example.com",
+        "first_name": "Żaneta Grzegorzewska-Wielkopolska " * 3,
+        "last_name": "Kowalski",
+    })[1]
+
+    assert "\r\n =?utf-8?" in raw, "the subject should be long enough to fold"
+    assert "\n" not in raw.replace("\r\n", "")
@@ -0,0 +1,34 @@
+"""Tests for the outbox relay."""
+
+import app.outbox as outbox
+from app.models import OutboxMessage
+from app.outbox import OutboxRelay
+from app.services import UserService
+
+
+def test_stop_finishes_current_batch(app, monkeypatch):
+    relay = OutboxRelay(batch_size=10, poll_interval=60)
+    published = []
+
+    def publish_batch(queue, payloads):
+        published.extend(payloads)
+        relay.stop()
+        return True
+
+    monkeypatch.setattr(outbox, "publish_batch", publish_batch)
+    with app.app_context():
+        UserService.create_user("Jan", "Kowalski", "jan@example.com", "securepass123")
+
+        relay.run()
+
+        assert len(published) == 1
+        assert OutboxMessage.query.count() == 0
+
+
+def test_failed_publish_keeps_rows(app, monkeypatch):
+    monkeypatch.setattr(outbox, "publish_batch", lambda queue, payloads: False)
+    with app.app_context():
+        UserService.create_user("Jan", "Kowalski", "jan@example.com", "securepass123")
+
+        assert OutboxRelay().relay_batch() is None
+        assert OutboxMessage.query.count() == 1
@@ -0,0 +1,45 @@
+"""Tests for the password hashing pool."""
+
+import threading
+import time
+
+import pytest
+
+from app.passwords import PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher("pbkdf2:sha256:100000", 16, workers=1)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_many_keeps_order(hasher):
+    passwords = [f"password{i}" for i in range(10)]
+
+    hashes = hasher.hash_many(passwords)
+
+    assert [hasher.verify(h, p) for h, p in zip(hashes, passwords)] == [True] * 10
+
+
+def test_login_does_not_queue_behind_import(hasher):
+    # Start both pools so process spawn is not timed
+    hasher.hash("warm")
+    hasher.hash_many(["warm", "up"])
+    start = time.perf_counter()
+    hasher.hash("login")
+    alone = time.perf_counter() - start
+
+    bulk = threading.Thread(target=hasher.hash_many, args=(["import"] * 80,))
+    start = time.perf_counter()
+    bulk.start()
+    time.sleep(0.2)
+    login_start = time.perf_counter()
+    hasher.hash("login")
+    login = time.perf_counter() - login_start
+    bulk.join()
+    import_seconds = time.perf_counter() - start
+
+    assert login < import_seconds / 4
+    assert login < max(alone * 10, 0.5)
@@ -0,0 +1,57 @@
+"""Tests for the login/register rate limiter."""
+
+import pytest
+
+import app.redis_client as redis_client
+from app.redis_client import LocalRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def local_buckets(monkeypatch):
+    # Fallback buckets are per process: start each test with empty ones
+    monkeypatch.setattr(redis_client, "_local_rate_limiter", LocalRateLimiter())
+
+
+def login(client):
+    return client.post("/api/auth/login", json={
+        "email": "jan.kowalski@example.com",
+        "password": "wrongpassword",
+    })
+
+
+def test_login_limited_after_max_requests(app, client):
+    app.config["RATE_LIMIT_LOGIN"] = 3
+
+    assert [login(client).status_code for _ in range(3)] == [401, 401, 401]
+    response = login(client)
+
+    assert response.status_code == 429
+    # 3 per 60s refill one request every 20s
+    assert 0 < int(response.headers["Retry-After"]) <= 20
+    assert response.get_json()["retry_after"] == int(response.headers["Retry-After"])
+
+
+def test_limit_is_shared_through_redis(app, client):
+    app.config["RATE_LIMIT_LOGIN"] = 2
+    login(client)
+    login(client)
+
+    # Another worker: its own (empty) local buckets, same Redis bucket
+    redis_client._local_rate_limiter = LocalRateLimiter()
+
+    assert login(client).status_code == 429
+
+
+def test_register_has_its_own_bucket(app, client):
+    app.config.update(RATE_LIMIT_LOGIN=1, RATE_LIMIT_REGISTER=1)
+    login(client)
+
+    response = client.post("/api/auth/register", json={
+        "first_name": "Jan",
+        "last_name": "Kowalski",
+        "email": "jan.kowalski@example.com",
+        "password": "securepass123",
+    })
+
+    assert response.status_code == 201
+    assert login(client).status_code == 429
@@ -0,0 +1,75 @@
+"""Tests for the Redis circuit breaker and the local rate limit fallback."""
+
+import time
+
+import pytest
+
+import app.redis_client as redis_client
+from app.redis_client import LocalRateLimiter, cache_get, get_redis
+from conftest import FakeBreakerRedis
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def breaker(app, redis_server, monkeypatch):
+    breaker = redis_client._breaker
+    monkeypatch.setattr(breaker, "retry_interval", 0.05)
+    monkeypatch.setattr(redis_client, "_local_rate_limiter", LocalRateLimiter())
+    yield breaker
+    redis_server.connected = True
+    assert wait_for(lambda: not breaker.is_open)
+
+
+def open_breaker(app, redis_server, breaker):
+    redis_server.connected = False
+    with app.app_context():
+        for _ in range(breaker.threshold):
+            cache_get("anything")
+    assert breaker.is_open
+
+
+def test_breaker_opens_after_threshold_errors(app, redis_server, breaker):
+    redis_server.connected = False
+    with app.app_context():
+        for _ in range(breaker.threshold - 1):
+            cache_get("anything")
+        assert not breaker.is_open
+
+        cache_get("anything")
+
+    assert breaker.is_open
+    assert get_redis() is None
+
+
+def test_probe_closes_breaker_once_redis_answers(app, redis_server, breaker):
+    open_breaker(app, redis_server, breaker)
+
+    # Probes keep failing while Redis is down
+    time.sleep(breaker.retry_interval * 4)
+    assert breaker.is_open
+
+    redis_server.connected = True
+    assert wait_for(lambda: not breaker.is_open)
+    assert get_redis() is not None
+
+
+def test_local_rate_limit_while_breaker_open(app, client, redis_server, breaker):
+    app.config["RATE_LIMIT_LOGIN"] = 2
+    open_breaker(app, redis_server, breaker)
+    credentials = {"email": "jan.kowalski@example.com", "password": "wrongpassword"}
+
+    statuses = [
+        client.post("/api/auth/login", json=credentials).status_code for _ in range(3)
+    ]
+
+    assert statuses == [401, 401, 429]
+    assert breaker.is_open
+    # The fallback buckets are per process: nothing was written to Redis
+    redis_server.connected = True
+    assert FakeBreakerRedis(server=redis_server).keys("rl:*") == []
@@ -0,0 +1,67 @@
+"""Tests for the email consumer supervisor."""
+
+import pytest
+
+from app import supervisor
+from app.supervisor import ScalingPolicy, Supervisor
+
+
+class FakeProcess:
+    """Stands in for a consumer subprocess; exits when ``returncode`` is set."""
+
+    def __init__(self, command, env=None):
+        self.env = env or {}
+        self.pid = id(self)
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def send_signal(self, signum):
+        pass
+
+    def kill(self):
+        self.returncode = -9
+
+    def wait(self):
+        return self.returncode
+
+
+@pytest.fixture(autouse=True)
+def fake_popen(monkeypatch):
+    monkeypatch.setattr(supervisor.subprocess, "Popen", FakeProcess)
+
+
+def ports(sup):
+    return sorted(int(p.env["EMAIL_CONSUMER_METRICS_PORT"]) for p in sup._slots)
+
+
+def test_metrics_ports_stay_in_range_while_draining():
+    sup = Supervisor(
+        ["consumer"], ScalingPolicy(min_procs=1, max_procs=2), monitor=None,
+        metrics_port=9100,
+    )
+    sup.scale_to(2)
+    assert ports(sup) == [9100, 9101]
+
+    # Scale down, then straight back up while the retired process drains
+    sup.scale_to(1)
+    draining, _ = sup._draining[0]
+    sup.scale_to(2)
+    assert len(sup._procs) == 1
+    assert ports(sup) == [9100, 9101]
+
+    draining.returncode = 0
+    sup._reap()
+    sup.scale_to(2)
+    assert len(sup._procs) == 2
+    assert ports(sup) == [9100, 9101]
+
+
+def test_without_metrics_port_draining_does_not_block_spawns():
+    sup = Supervisor(["consumer"], ScalingPolicy(min_procs=1, max_procs=2), monitor=None)
+    sup.scale_to(2)
+    sup.scale_to(1)
+    sup.scale_to(2)
+
+    assert len(sup._procs) == 2
@@ -0,0 +1,74 @@
+"""Tests for the User entity cache."""
+
+import pytest
+
+import app.redis_client as redis_client
+from app.models import User
+from app.redis_client import cache_get
+from app.services import UserService
+from app.user_cache import USER_INVALIDATION_CHANNEL, user_cache
+from conftest import FakeBreakerRedis
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        user, error = UserService.create_user("Jan", "Kowalski", "jan@example.com", "securepass123")
+        assert error is None
+        return user.id
+
+
+@pytest.fixture
+def shared_cache(app, monkeypatch):
+    """Redis-backed user cache, in sync without the listener thread."""
+    monkeypatch.setattr(redis_client._listener, "start", lambda: None)
+    monkeypatch.setattr(user_cache, "use_redis", True)
+    user_cache.on_sync(None)
+    yield user_cache
+    user_cache.on_desync()
+
+
+def test_password_hash_not_shared(app, shared_cache, user, sql_statements):
+    with app.app_context():
+        UserService.get_by_id(user)
+        assert "password_hash" not in cache_get(f"user_entity:{user}")
+
+        # Another worker: empty local tier, entry comes from Redis
+        shared_cache.clear()
+        sql_statements.clear()
+        cached = UserService.get_by_id(user)
+        assert cached.email == "jan@example.com"
+        assert sql_statements == []
+
+        assert cached.check_password("securepass123")
+        assert len(sql_statements) == 1
+
+
+def test_invalidate_announces_user(app, redis_server, shared_cache, user):
+    pubsub = FakeBreakerRedis(server=redis_server, decode_responses=True).pubsub(
+        ignore_subscribe_messages=True
+    )
+    pubsub.subscribe(USER_INVALIDATION_CHANNEL)
+
+    with app.app_context():
+        UserService.update_user(user, first_name="Janek")
+
+    messages = [pubsub.get_message(timeout=0.1) for _ in range(3)]
+    assert [m["data"] for m in messages if m] == [str(user)]
+
+
+def test_announcement_drops_local_copy(app, shared_cache, user):
+    with app.app_context():
+        UserService.get_by_id(user)
+        assert shared_cache._get_local(user) is not None
+
+        shared_cache.on_message(str(user))
+        assert shared_cache._get_local(user) is None
+
+
+def test_local_tier_bypassed_while_unsubscribed(app, user, monkeypatch):
+    monkeypatch.setattr(redis_client._listener, "start", lambda: None)
+    user_cache.on_desync()
+    with app.app_context():
+        assert isinstance(UserService.get_by_id(user), User)
+        assert user_cache._get_local(user) is None
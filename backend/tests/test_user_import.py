@@ -0,0 +1,86 @@
+"""Tests for bulk user import."""
+
+import io
+import json
+
+import pytest
+
+from app.models import User
+from app.user_import import UserImporter, read_rows
+
+
+def ndjson(*emails):
+    return "".join(
+        json.dumps({
+            "first_name": "Jan",
+            "last_name": "Kowalski",
+            "email": email,
+            "password": "securepass123",
+        }) + "\n"
+        for email in emails
+    )
+
+
+@pytest.fixture
+def admin_headers(app):
+    app.config["ADMIN_API_TOKEN"] = "secret"
+    return {"X-Admin-Token": "secret", "Content-Type": "application/x-ndjson"}
+
+
+def test_import_streams_ndjson_report(client, admin_headers):
+    response = client.post(
+        "/api/admin/users/import",
+        data=ndjson("a@example.com", "b@example.com", "a@example.com"),
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["status"] for line in lines[:-1]] == ["created", "created", "duplicate"]
+    assert lines[-1]["summary"]["created"] == 2
+
+
+def test_rows_after_failed_batch_are_retried(app, monkeypatch):
+    importer = UserImporter(batch_size=1, send_emails=False)
+    original_insert = importer._insert
+    calls = []
+
+    def flaky_insert(rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return original_insert(rows)
+
+    monkeypatch.setattr(importer, "_insert", flaky_insert)
+    with app.app_context():
+        summary = importer.run(io.StringIO(ndjson("a@example.com", "a@example.com")), "ndjson")
+
+        assert summary["error"] == 1
+        assert summary["created"] == 1
+        assert User.query.filter_by(email="a@example.com").count() == 1
+
+
+def test_undecodable_row_is_reported_invalid(client, admin_headers):
+    body = (
+        ndjson("a@example.com").encode()
+        + ndjson("c@example.com").replace("Jan", "Łukasz").encode("cp1250")
+        + ndjson("b@example.com").encode()
+    )
+
+    response = client.post("/api/admin/users/import", data=body, headers=admin_headers)
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["status"] for line in lines[:-1]] == ["created", "invalid", "created"]
+    assert lines[1]["errors"] == {"_row": ["invalid UTF-8"]}
+    assert lines[-1]["summary"]["invalid"] == 1
+
+
+def test_strict_decoding_error_ends_input_with_invalid_row():
+    data = ndjson("a@example.com").encode() + b"\xff\n" * 10000
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", newline="")
+
+    records = list(read_rows(stream, "ndjson"))
+
+    assert records[-1][1] is None
+    assert records[-1][2].startswith("invalid UTF-8")
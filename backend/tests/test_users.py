@@ -0,0 +1,42 @@
+"""Tests for the /api/users endpoints."""
+
+import pytest
+
+from app.user_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def no_user_cache(app, monkeypatch):
+    # Cache hits must avoid SQL because the user is never loaded, not
+    # because the User entity cache answered
+    monkeypatch.setattr(user_cache, "enabled", False)
+
+
+@pytest.mark.parametrize("path", ["/api/users/me", "/api/users/me/balance"])
+def test_cached_response_issues_no_sql(client, auth_headers, sql_statements, path):
+    assert client.get(path, headers=auth_headers).status_code == 200
+    assert sql_statements, "the first request should load the user"
+
+    sql_statements.clear()
+    response = client.get(path, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert sql_statements == []
+
+
+def test_profile_cache_miss_loads_user(client, auth_headers, sql_statements):
+    response = client.get("/api/users/me", headers=auth_headers)
+
+    assert response.get_json()["user"]["email"] == "jan.kowalski@example.com"
+    assert any("FROM users" in statement for statement in sql_statements)
+
+
+def test_cached_profile_takes_one_redis_round_trip(app, client, auth_headers):
+    app.config["REDIS_ROUNDTRIP_HEADER"] = True
+    client.get("/api/users/me", headers=auth_headers)
+
+    response = client.get("/api/users/me", headers=auth_headers)
+
+    # Blocklist check and prefetched cache read share one pipeline
+    assert response.status_code == 200
+    assert response.headers["X-Redis-Round-Trips"] == "1"
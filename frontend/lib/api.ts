@@ -15,12 +15,20 @@ export interface LoginResponse {
   message: string
   user: User
   accessToken: string
+  // Absent when the server could not record it (its Redis was down)
+  refreshToken?: string
 }
 
 export interface RegisterResponse {
   message: string
   user: User
   accessToken: string
+  refreshToken?: string
+}
+
+export interface RefreshResponse {
+  accessToken: string
+  refreshToken?: string
 }
 
 export interface BalanceResponse {
@@ -83,10 +91,76 @@ function getToken(): string | null {
   return localStorage.getItem('token')
 }
 
+// Get refresh token from localStorage
+function getRefreshToken(): string | null {
+  if (typeof window === 'undefined') return null
+  return localStorage.getItem('refreshToken')
+}
+
+// Listeners told about the current access token (null once cleared)
+type TokenListener = (accessToken: string | null) => void
+const tokenListeners = new Set<TokenListener>()
+
+// Subscribe to token changes, including silent refreshes; returns unsubscribe
+export function onTokensChanged(listener: TokenListener): () => void {
+  tokenListeners.add(listener)
+  return () => {
+    tokenListeners.delete(listener)
+  }
+}
+
+// Persist a token pair in localStorage
+export function storeTokens(tokens: RefreshResponse): void {
+  localStorage.setItem('token', tokens.accessToken)
+  if (tokens.refreshToken) {
+    localStorage.setItem('refreshToken', tokens.refreshToken)
+  } else {
+    localStorage.removeItem('refreshToken')
+  }
+  tokenListeners.forEach((listener) => listener(tokens.accessToken))
+}
+
+// Remove tokens from localStorage
+export function clearTokens(): void {
+  localStorage.removeItem('token')
+  localStorage.removeItem('refreshToken')
+  tokenListeners.forEach((listener) => listener(null))
+}
+
+// Shared in-flight refresh so concurrent 401s rotate the token only once
+let refreshInFlight: Promise<boolean> | null = null
+
+// Exchange the refresh token for a new token pair
+async function refreshTokens(): Promise<boolean> {
+  const refreshToken = getRefreshToken()
+  if (!refreshToken) return false
+
+  if (!refreshInFlight) {
+    refreshInFlight = fetch(`${API_BASE_URL}/api/auth/refresh`, {
+      method: 'POST',
+      headers: { Authorization: `Bearer ${refreshToken}` },
+    })
+      .then(async (response) => {
+        if (!response.ok) {
+          clearTokens()
+          return false
+        }
+        storeTokens(convertKeysToCamel<RefreshResponse>(await response.json()))
+        return true
+      })
+      .catch(() => false)
+      .finally(() => {
+        refreshInFlight = null
+      })
+  }
+  return refreshInFlight
+}
+
 // Generic fetch wrapper with JWT and case conversion
 async function fetchApi<T>(
   endpoint: string,
-  options: RequestInit = {}
+  options: RequestInit = {},
+  retryOnUnauthorized = true
 ): Promise<T> {
   const token = getToken()
 
@@ -118,6 +192,17 @@ async function fetchApi<T>(
     body,
   })
 
+  // Access token expired: refresh once and replay the request
+  if (
+    response.status === 401 &&
+    retryOnUnauthorized &&
+    token &&
+    !endpoint.startsWith('/api/auth/') &&
+    (await refreshTokens())
+  ) {
+    return fetchApi<T>(endpoint, options, false)
+  }
+
   const data = await response.json()
 
   if (!response.ok) {
@@ -13,6 +13,9 @@ import {
   register as apiRegister,
   logout as apiLogout,
   getProfile,
+  storeTokens,
+  clearTokens,
+  onTokensChanged,
   type User,
   type LoginResponse,
   type RegisterResponse,
@@ -39,6 +42,16 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   const [token, setToken] = useState<string | null>(null)
   const [isLoading, setIsLoading] = useState(true)
 
+  // Follow tokens rotated by a silent refresh (or cleared when it fails)
+  useEffect(
+    () =>
+      onTokensChanged((accessToken) => {
+        setToken(accessToken)
+        if (!accessToken) setUser(null)
+      }),
+    []
+  )
+
   // Initialize auth state from localStorage
   useEffect(() => {
     const storedToken = localStorage.getItem('token')
@@ -51,7 +64,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
         })
         .catch(() => {
           // Token invalid, clear it
-          localStorage.removeItem('token')
+          clearTokens()
           setToken(null)
         })
         .finally(() => {
@@ -65,7 +78,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   const login = useCallback(
     async (email: string, password: string): Promise<LoginResponse> => {
       const response = await apiLogin(email, password)
-      localStorage.setItem('token', response.accessToken)
+      storeTokens(response)
       setToken(response.accessToken)
       setUser(response.user)
       return response
@@ -81,7 +94,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
       password: string
     }): Promise<RegisterResponse> => {
       const response = await apiRegister(data)
-      localStorage.setItem('token', response.accessToken)
+      storeTokens(response)
       setToken(response.accessToken)
       setUser(response.user)
       return response
@@ -91,7 +104,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
 
   const logout = useCallback(async () => {
     await apiLogout()
-    localStorage.removeItem('token')
+    clearTokens()
     setToken(null)
     setUser(null)
   }, [])